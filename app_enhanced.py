@@ -8,13 +8,14 @@ import pandas as pd
 import sqlite3
 from datetime import datetime
 import os
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 # Import custom modules
-from models.recommender import BookRecommender
+from models.recommender import BookRecommender, build_indices
 from models.summarizer import BookSummarizer
 from models.sentiment import SentimentAnalyzer
 from models.translator import BookTranslator
@@ -144,19 +145,30 @@ def load_books():
         # Allow different filenames, prioritize local version
         dist_dir = Path('.dist')
         
-        # First try to load CSV with local paths
-        local_csv = dist_dir / 'gutenberg_html_dataset_local.csv'
-        if local_csv.exists():
-            csv_path = local_csv
-        else:
-            # Fallback to original CSV
-            csv_candidates = list(dist_dir.glob('gutenberg_html_dataset*.csv'))
-            if csv_candidates:
-                csv_path = csv_candidates[0]
-            else:
-                csv_path = dist_dir / 'gutenberg_html_dataset.csv'
+        # First try the typed Parquet copy written by update_csv_with_local_paths.py
+        # (needs pyarrow), then the CSV with local paths
+        df = None
+        local_parquet = dist_dir / 'gutenberg_html_dataset_local.parquet'
+        if local_parquet.exists():
+            try:
+                df = pd.read_parquet(local_parquet)
+            except Exception:
+                # No pyarrow, or an unreadable file: the CSV has the same rows
+                df = None
         
-        df = pd.read_csv(csv_path)
+        if df is None:
+            local_csv = dist_dir / 'gutenberg_html_dataset_local.csv'
+            if local_csv.exists():
+                csv_path = local_csv
+            else:
+                # Fallback to original CSV
+                csv_candidates = list(dist_dir.glob('gutenberg_html_dataset*.csv'))
+                if csv_candidates:
+                    csv_path = csv_candidates[0]
+                else:
+                    csv_path = dist_dir / 'gutenberg_html_dataset.csv'
+            
+            df = pd.read_csv(csv_path)
 
         # Prioritize Local_HTML_Path over HTML_Link if it exists
         if 'Local_HTML_Path' in df.columns:
@@ -203,6 +215,15 @@ def load_books():
         st.error(f"Error loading dataset: {e}")
         return pd.DataFrame()
 
+@st.cache_resource
+def load_book_indices():
+    """Bookshelf/Author inverted indices of the catalog, built once per process.
+
+    load_books() hands every rerun a fresh copy of the same frame, so the
+    indices (row positions) are built once and shared by all of those copies.
+    """
+    return build_indices(load_books())
+
 # Initialize session state
 def init_session_state():
     # Core session flags
@@ -760,6 +781,23 @@ def show_book_catalog(books_df):
                         )
                         st.success("Bookmarked!")
 
+def stream_preview(render, interval=0.25):
+    """on_chunk callback for streamed text: collects the chunks and re-renders
+    the text so far with render() at most once every `interval` seconds.
+
+    Re-rendering on every chunk would resend the whole text thousands of
+    times for a long story; the caller renders the final text itself.
+    """
+    parts = []
+    last_render = [0.0]
+    def on_chunk(chunk):
+        parts.append(chunk)
+        now = time.monotonic()
+        if now - last_render[0] >= interval:
+            last_render[0] = now
+            render(''.join(parts))
+    return on_chunk
+
 def show_story_generator():
     """AI Story Generator Page"""
     st.header("✨ AI Story Generator")
@@ -792,7 +830,11 @@ def show_story_generator():
         if st.button("🎭 Generate Story", type="primary"):
             if prompt:
                 with st.spinner("Creating your story..."):
-                    story = story_gen.generate_story(prompt, genre, length, style)
+                    # Show the text while it streams in, then replace it with the formatted story
+                    preview = st.empty()
+                    show_progress = stream_preview(preview.markdown)
+                    story = story_gen.generate_story(prompt, genre, length, style, on_chunk=show_progress)
+                    preview.empty()
                     
                     st.success("Story generated!")
                     st.markdown(f"## {story['title']}")
@@ -868,9 +910,12 @@ def show_story_generator():
         if st.button("Continue Story"):
             if existing_story and continuation_prompt:
                 with st.spinner("Continuing your story..."):
-                    continuation = story_gen.continue_story(existing_story, continuation_prompt)
                     st.markdown("### Continuation:")
-                    st.write(continuation)
+                    preview = st.empty()
+                    show_progress = stream_preview(preview.write)
+                    continuation = story_gen.continue_story(existing_story, continuation_prompt,
+                                                            on_chunk=show_progress)
+                    preview.write(continuation)
             else:
                 st.warning("Please provide both the existing story and continuation prompt")
 
@@ -1011,7 +1056,8 @@ def show_mood_recommendations(books_df):
             st.info(f"Perfect for: {mood_info['book_types']}")
             
             # Get recommendations
-            recommendations = mood_rec.get_mood_recommendations(books_df, selected_mood, 10)
+            recommendations = mood_rec.get_mood_recommendations(books_df, selected_mood, 10,
+                                                              indices=load_book_indices())
             
             st.subheader("📚 Recommended Books:")
             for idx, book in recommendations.iterrows():
@@ -1090,7 +1136,8 @@ def show_mood_recommendations(books_df):
                 st.success(f"Detected mood: {mood_info['emoji']} {detected_mood.title()}")
                 st.write(mood_info['description'])
                 
-                recommendations = mood_rec.get_mood_recommendations(books_df, detected_mood, 8)
+                recommendations = mood_rec.get_mood_recommendations(books_df, detected_mood, 8,
+                                                                  indices=load_book_indices())
                 
                 st.subheader("📚 Recommended Books:")
                 for idx, book in recommendations.iterrows():
@@ -1595,7 +1642,7 @@ def show_recommendations(books_df):
         selected_genre = st.selectbox("Select your favorite genre:", genres)
         
         if st.button("Get Recommendations"):
-            recommendations = recommender.recommend_by_genre(books_df, selected_genre)
+            recommendations = recommender.recommend_by_genre(books_df, selected_genre, load_book_indices())
             display_recommendations(recommendations)
     
     elif method == "By Author":
@@ -1603,7 +1650,7 @@ def show_recommendations(books_df):
         selected_author = st.selectbox("Select your favorite author:", authors)
         
         if st.button("Get Recommendations"):
-            recommendations = recommender.recommend_by_author(books_df, selected_author)
+            recommendations = recommender.recommend_by_author(books_df, selected_author, load_book_indices())
             display_recommendations(recommendations)
     
     else:
@@ -1611,7 +1658,7 @@ def show_recommendations(books_df):
         selected_book = st.selectbox("Select a book you like:", book_titles)
         
         if st.button("Get Recommendations"):
-            recommendations = recommender.recommend_by_book(books_df, selected_book)
+            recommendations = recommender.recommend_by_book(books_df, selected_book, load_book_indices())
             display_recommendations(recommendations)
 
 def display_recommendations(recommendations):
@@ -5,9 +5,25 @@ Analyze book data, user trends, and generate insights
 import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 from collections import Counter
 
+# A NULL username matches every user, so one prepared statement serves both cases
+_Q_TRENDS = '''SELECT DATE(timestamp) as date, COUNT(*) as count,
+                     AVG(duration_minutes) as avg_duration
+              FROM reading_activities
+              WHERE (?1 IS NULL OR username = ?1) AND timestamp >= ?2
+              GROUP BY DATE(timestamp)
+              ORDER BY date'''
+
+_Q_GENRES = '''SELECT genre, COUNT(*) as count
+              FROM reading_activities
+              WHERE ?1 IS NULL OR username = ?1
+              GROUP BY genre
+              ORDER BY count DESC'''
+
+_DAY_NAMES = ('Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday')
+
 class DataAnalytics:
     """Analyze library data and user behavior"""
     
@@ -15,6 +31,35 @@ class DataAnalytics:
         """Initialize data analytics"""
         self.db_path = db_path
     
+    def _iter_query(self, query: str, params: tuple, batch: int = 256) -> Iterator[tuple]:
+        """Yield result rows in fetchmany batches, closing the connection when done"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            c = conn.cursor()
+            c.execute(query, params)
+            while rows := c.fetchmany(batch):
+                yield from rows
+        finally:
+            conn.close()
+    
+    def iter_reading_trends(self, username: Optional[str] = None,
+                            days: int = 30, batch: int = 256) -> Iterator[Dict]:
+        """
+        Stream daily reading activity without materializing the result set
+        
+        Args:
+            username: Specific user (None for all users)
+            days: Number of days to analyze
+            batch: Rows fetched from SQLite per round-trip
+        
+        Yields:
+            Dictionaries with date, count and avg_duration
+        """
+        cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        
+        for r in self._iter_query(_Q_TRENDS, (username or None, cutoff), batch):
+            yield {"date": r[0], "count": r[1], "avg_duration": r[2]}
+    
     def get_reading_trends(self, username: Optional[str] = None, 
                           days: int = 30) -> Dict:
         """
@@ -28,33 +73,13 @@ class DataAnalytics:
             Dictionary with trend data
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            # Get reading activities
-            if username:
-                query = '''SELECT DATE(timestamp) as date, COUNT(*) as count, 
-                                 AVG(duration_minutes) as avg_duration
-                          FROM reading_activities 
-                          WHERE username = ? AND timestamp >= ?
-                          GROUP BY DATE(timestamp)
-                          ORDER BY date'''
-                params = (username, (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d"))
-            else:
-                query = '''SELECT DATE(timestamp) as date, COUNT(*) as count,
-                                 AVG(duration_minutes) as avg_duration
-                          FROM reading_activities 
-                          WHERE timestamp >= ?
-                          GROUP BY DATE(timestamp)
-                          ORDER BY date'''
-                params = ((datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d"),)
-            
-            df = pd.read_sql_query(query, conn, params=params)
-            conn.close()
+            daily = list(self.iter_reading_trends(username, days))
+            durations = [d["avg_duration"] for d in daily if d["avg_duration"] is not None]
             
             return {
-                "daily_activity": df.to_dict('records'),
-                "total_activities": int(df['count'].sum()) if not df.empty else 0,
-                "avg_daily_reading": float(df['avg_duration'].mean()) if not df.empty else 0
+                "daily_activity": daily,
+                "total_activities": sum(d["count"] for d in daily),
+                "avg_daily_reading": sum(durations) / len(durations) if durations else 0
             }
         except sqlite3.OperationalError:
             return {
@@ -76,21 +101,7 @@ class DataAnalytics:
         try:
             conn = sqlite3.connect(self.db_path)
             
-            if username:
-                query = '''SELECT genre, COUNT(*) as count 
-                          FROM reading_activities 
-                          WHERE username = ?
-                          GROUP BY genre
-                          ORDER BY count DESC'''
-                params = (username,)
-            else:
-                query = '''SELECT genre, COUNT(*) as count 
-                          FROM reading_activities 
-                          GROUP BY genre
-                          ORDER BY count DESC'''
-                params = ()
-            
-            df = pd.read_sql_query(query, conn, params=params)
+            df = pd.read_sql_query(_Q_GENRES, conn, params=(username or None,))
             conn.close()
             
             return {
@@ -183,6 +194,32 @@ class DataAnalytics:
             "total_users": total_users
         }
     
+    def iter_popular_books(self, limit: int = 10, days: int = 30,
+                           batch: int = 256) -> Iterator[Dict]:
+        """
+        Stream the most popular books without materializing the result set
+        
+        Args:
+            limit: Number of books to return
+            days: Time period to analyze
+            batch: Rows fetched from SQLite per round-trip
+        
+        Yields:
+            Popular book dictionaries
+        """
+        query = '''SELECT book_title, genre, COUNT(*) as read_count,
+                         COUNT(DISTINCT username) as unique_readers
+                  FROM reading_activities
+                  WHERE timestamp >= ?
+                  GROUP BY book_title
+                  ORDER BY read_count DESC
+                  LIMIT ?'''
+        params = ((datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d"), limit)
+        
+        for r in self._iter_query(query, params, batch):
+            yield {"book_title": r[0], "genre": r[1],
+                   "read_count": r[2], "unique_readers": r[3]}
+    
     def get_popular_books(self, limit: int = 10, days: int = 30) -> List[Dict]:
         """
         Get most popular books based on reading activity
@@ -195,61 +232,45 @@ class DataAnalytics:
             List of popular books
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            query = '''SELECT book_title, genre, COUNT(*) as read_count,
-                             COUNT(DISTINCT username) as unique_readers
-                      FROM reading_activities
-                      WHERE timestamp >= ?
-                      GROUP BY book_title
-                      ORDER BY read_count DESC
-                      LIMIT ?'''
-            
-            df = pd.read_sql_query(
-                query, 
-                conn, 
-                params=((datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d"), limit)
-            )
-            conn.close()
-            
-            return df.to_dict('records')
+            return list(self.iter_popular_books(limit, days))
         except sqlite3.OperationalError:
             return []
     
-    def get_reading_heatmap(self, username: str) -> Dict:
+    def iter_reading_heatmap(self, username: str, batch: int = 256) -> Iterator[Dict]:
         """
-        Generate reading activity heatmap data
+        Stream reading activity counts by day and hour
         
         Args:
             username: Username to analyze
+            batch: Rows fetched from SQLite per round-trip
         
-        Returns:
-            Heatmap data by day and hour
+        Yields:
+            Dictionaries with day, hour and count
         """
-        conn = sqlite3.connect(self.db_path)
-        
-        query = '''SELECT strftime('%w', timestamp) as day_of_week,
-                         strftime('%H', timestamp) as hour_of_day,
+        query = '''SELECT CAST(strftime('%w', timestamp) AS INTEGER) as day_of_week,
+                         CAST(strftime('%H', timestamp) AS INTEGER) as hour_of_day,
                          COUNT(*) as activity_count
                   FROM reading_activities
                   WHERE username = ?
                   GROUP BY day_of_week, hour_of_day'''
         
-        df = pd.read_sql_query(query, conn, params=(username,))
-        conn.close()
+        # SQLite returns integer columns, so rows unpack without per-value conversion
+        for dow, hr, cnt in self._iter_query(query, (username,), batch):
+            yield {"day": _DAY_NAMES[dow], "hour": hr, "count": cnt}
+    
+    def get_reading_heatmap(self, username: str) -> Dict:
+        """
+        Generate reading activity heatmap data
         
-        # Convert to more readable format
-        days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+        Args:
+            username: Username to analyze
         
+        Returns:
+            Heatmap data by day and hour
+        """
         heatmap = {}
-        for _, row in df.iterrows():
-            day = days[int(row['day_of_week'])]
-            hour = int(row['hour_of_day'])
-            count = int(row['activity_count'])
-            
-            if day not in heatmap:
-                heatmap[day] = {}
-            heatmap[day][hour] = count
+        for cell in self.iter_reading_heatmap(username):
+            heatmap.setdefault(cell["day"], {})[cell["hour"]] = cell["count"]
         
         return heatmap
     
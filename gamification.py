@@ -98,6 +98,24 @@ class GamificationSystem:
         }
     }
     
+    # (name, icon) per badge for serializing earned badges
+    _BADGE_META = {k: (v["name"], v["icon"]) for k, v in BADGES.items()}
+    
+    # (badge_id, requirement) pairs checked against books read and longest streak
+    BOOK_BADGES = (
+        ("first_book", 1),
+        ("bookworm", 10),
+        ("scholar", 25),
+        ("librarian", 50),
+        ("master_reader", 100)
+    )
+    
+    STREAK_BADGES = (
+        ("streak_7", 7),
+        ("streak_30", 30),
+        ("streak_100", 100)
+    )
+    
     def __init__(self, db_path: str = 'library.db'):
         """Initialize gamification system"""
         self.db_path = db_path
@@ -196,61 +214,30 @@ class GamificationSystem:
     
     def _update_user_stats(self, username: str, cursor):
         """Update user statistics"""
-        # Ensure user stats exist
-        cursor.execute('SELECT username FROM user_stats WHERE username = ?', (username,))
-        if not cursor.fetchone():
-            cursor.execute('''INSERT INTO user_stats (username) VALUES (?)''', (username,))
-        
-        # Update streak
-        cursor.execute('SELECT last_activity_date, current_streak FROM user_stats WHERE username = ?',
-                      (username,))
-        result = cursor.fetchone()
-        
-        if result and result[0]:
-            last_date = datetime.strptime(result[0], "%Y-%m-%d").date()
-            today = datetime.now().date()
-            days_diff = (today - last_date).days
-            
-            if days_diff == 0:
-                # Same day, no streak change
-                pass
-            elif days_diff == 1:
-                # Consecutive day, increment streak
-                new_streak = result[1] + 1
-                cursor.execute('''UPDATE user_stats 
-                                SET current_streak = ?,
-                                    longest_streak = MAX(longest_streak, ?),
-                                    last_activity_date = ?
-                                WHERE username = ?''',
-                             (new_streak, new_streak, today.strftime("%Y-%m-%d"), username))
-            else:
-                # Streak broken, reset to 1
-                cursor.execute('''UPDATE user_stats 
-                                SET current_streak = 1,
-                                    last_activity_date = ?
-                                WHERE username = ?''',
-                             (today.strftime("%Y-%m-%d"), username))
-        else:
-            # First activity
-            cursor.execute('''UPDATE user_stats 
-                            SET current_streak = 1,
-                                longest_streak = 1,
-                                last_activity_date = ?
-                            WHERE username = ?''',
-                         (datetime.now().strftime("%Y-%m-%d"), username))
-        
-        # Update XP and level
-        cursor.execute('''UPDATE user_stats 
-                        SET experience_points = experience_points + 10
-                        WHERE username = ?''', (username,))
-        
-        cursor.execute('SELECT experience_points FROM user_stats WHERE username = ?',
-                      (username,))
-        xp = cursor.fetchone()[0]
-        new_level = (xp // 100) + 1
-        
-        cursor.execute('UPDATE user_stats SET level = ? WHERE username = ?',
-                      (new_level, username))
+        # Insert the first activity or roll the streak, XP and level forward
+        # in a single upsert. SET expressions read the pre-update row values.
+        today = datetime.now().strftime("%Y-%m-%d")
+        cursor.execute('''INSERT INTO user_stats
+                            (username, current_streak, longest_streak,
+                             last_activity_date, experience_points, level)
+                        VALUES (?, 1, 1, ?, 10, 1)
+                        ON CONFLICT(username) DO UPDATE SET
+                            current_streak = CASE
+                                WHEN last_activity_date = excluded.last_activity_date
+                                    THEN current_streak
+                                WHEN date(last_activity_date, '+1 day') = excluded.last_activity_date
+                                    THEN current_streak + 1
+                                ELSE 1 END,
+                            longest_streak = MAX(longest_streak, CASE
+                                WHEN last_activity_date = excluded.last_activity_date
+                                    THEN current_streak
+                                WHEN date(last_activity_date, '+1 day') = excluded.last_activity_date
+                                    THEN current_streak + 1
+                                ELSE 1 END),
+                            last_activity_date = excluded.last_activity_date,
+                            experience_points = experience_points + 10,
+                            level = (experience_points + 10) / 100 + 1''',
+                       (username, today))
     
     def _check_badges(self, username: str, cursor):
         """Check and award eligible badges"""
@@ -264,52 +251,34 @@ class GamificationSystem:
         
         books_read, current_streak, longest_streak = stats
         
-        # Check book count badges
-        book_badges = [
-            ("first_book", 1),
-            ("bookworm", 10),
-            ("scholar", 25),
-            ("librarian", 50),
-            ("master_reader", 100)
-        ]
+        # Skip thresholds for badges the user already owns
+        cursor.execute('SELECT badge_id FROM user_badges WHERE username = ?', (username,))
+        earned = {row[0] for row in cursor.fetchall()}
         
-        for badge_id, requirement in book_badges:
-            if books_read >= requirement:
-                self._award_badge(username, badge_id, cursor)
+        candidates = [badge_id for badge_id, requirement in self.BOOK_BADGES
+                      if badge_id not in earned and books_read >= requirement]
+        candidates += [badge_id for badge_id, requirement in self.STREAK_BADGES
+                       if badge_id not in earned and longest_streak >= requirement]
         
-        # Check streak badges
-        streak_badges = [
-            ("streak_7", 7),
-            ("streak_30", 30),
-            ("streak_100", 100)
-        ]
+        # Check genre diversity
+        if "genre_explorer" not in earned:
+            cursor.execute('''SELECT COUNT(DISTINCT genre) FROM reading_activities 
+                             WHERE username = ?''', (username,))
+            genre_count = cursor.fetchone()[0]
+            if genre_count >= 5:
+                candidates.append("genre_explorer")
+        
+        if not candidates:
+            return
         
-        for badge_id, requirement in streak_badges:
-            if longest_streak >= requirement:
-                self._award_badge(username, badge_id, cursor)
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor.executemany('''INSERT OR IGNORE INTO user_badges VALUES (?, ?, ?)''',
+                           [(username, badge_id, now) for badge_id in candidates])
         
-        # Check genre diversity
-        cursor.execute('''SELECT COUNT(DISTINCT genre) FROM reading_activities 
-                         WHERE username = ?''', (username,))
-        genre_count = cursor.fetchone()[0]
-        if genre_count >= 5:
-            self._award_badge(username, "genre_explorer", cursor)
-    
-    def _award_badge(self, username: str, badge_id: str, cursor):
-        """Award a badge to user if not already earned"""
-        cursor.execute('''SELECT badge_id FROM user_badges 
-                         WHERE username = ? AND badge_id = ?''',
-                      (username, badge_id))
-        
-        if not cursor.fetchone():
-            cursor.execute('''INSERT INTO user_badges VALUES (?, ?, ?)''',
-                         (username, badge_id,
-                          datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-            
-            # Award bonus XP
-            cursor.execute('''UPDATE user_stats 
-                            SET experience_points = experience_points + 50
-                            WHERE username = ?''', (username,))
+        # Award bonus XP for each badge actually inserted
+        cursor.execute('''UPDATE user_stats 
+                        SET experience_points = experience_points + ?
+                        WHERE username = ?''', (50 * cursor.rowcount, username))
     
     def get_user_stats(self, username: str) -> Dict:
         """Get user statistics and progress"""
@@ -349,10 +318,11 @@ class GamificationSystem:
             "badges": [
                 {
                     "id": b[0],
-                    "name": self.BADGES[b[0]]["name"],
-                    "icon": self.BADGES[b[0]]["icon"],
+                    "name": name,
+                    "icon": icon,
                     "earned_date": b[1]
-                } for b in badges if b[0] in self.BADGES
+                } for b in badges
+                for name, icon in (self._BADGE_META.get(b[0], (None, None)),) if name
             ],
             "recent_activities": [
                 {
@@ -1,4 +1,7 @@
+import csv
 import os
+import re
+from collections import deque
 
 os.system('apt install libdb5.3-dev')
 os.system('pip install gutenberg')
@@ -8,105 +11,79 @@ import pandas as pd
 import requests
 import numpy as np
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from urllib.request import urlopen
 from gutenberg.acquire import load_etext
+from gutenberg._domain_model.exceptions import UnknownDownloadUriException
 from gutenberg.cleanup import strip_headers
 
+# mis-decoded UTF-8 punctuation left behind by str(bytes)
+_FUNNY = {'xe2x80x9c': ' ', 'xe2x80x9d': ' ', 'xe2x80x94': ' ', 'xe2x80x99': "'", 'xe2x80x98': "'"}
+_FUNNY_RE = re.compile('|'.join(map(re.escape, _FUNNY)))
+
+# ebook id at the end of a gutenberg.org/ebooks/<id> link
+_TRAILING_ID_RE = re.compile(r'/(\d+)$')
+
 # only removes funny tokens for English texts
 def remove_funny_tokens(text):
-    tokens = text.split()
-    sample = ' '.join(' '.join(tokens).replace('xe2x80x9c', ' ').replace('xe2x80x9d', ' ')\
-                                      .replace('xe2x80x94', ' ').replace('xe2x80x99', "'")\
-                                      .replace('xe2x80x98', "'").split())
-    return sample
+    return ' '.join(_FUNNY_RE.sub(lambda m: _FUNNY[m.group(0)], text).split())
 
 # clean newlines, carriage returns and tabs
 def clean_text(text):
-    cleaned_listed_text = []
-    listed_text = list(text)
-
-    for iter in range(len(listed_text) - 1):
-        if (listed_text[iter] == '\\' and listed_text[iter + 1] == 'n') or \
-            (listed_text[iter] == 'n' and listed_text[iter - 1] == '\\'):
-            continue
-        elif listed_text[iter] == '\\' and listed_text[iter + 1] == 'r' or \
-            (listed_text[iter] == 'r' and listed_text[iter - 1] == '\\'):
-            continue
-        elif listed_text[iter] == '\\' and listed_text[iter + 1] == 't' or \
-            (listed_text[iter] == 't' and listed_text[iter - 1] == '\\'):
-            continue
-        elif listed_text[iter] == '\\':
-            continue
-        else:
-            cleaned_listed_text.append(listed_text[iter])
-
-    cleaned_text = ''.join([str(char) for char in cleaned_listed_text])
-    cleaned_text = remove_funny_tokens(cleaned_text)
-
-    return ''.join(cleaned_text)
-
-df_metadata = pd.read_csv('gutenberg_metadata.csv')
-
-data = {'Author': None, 'Title': None, 'Link': None, 'ID': None, 'Bookshelf': None, 'Text': None}
-
-for key, row in df_metadata.iterrows():
-    if data['Author'] == None:
-        data['Author'] = [row['Author']]
-    else:
-        data['Author'].append(row['Author'])
-    
-    if data['Title'] == None:
-        data['Title'] = [row['Title']]
-    else:
-        data['Title'].append(row['Title'])
-    
-    if data['Link'] == None:
-        data['Link'] = [row['Link']]
-    else:
-        data['Link'].append(row['Link'])
-    
-    book_id = int(row['Link'].split('/')[-1])
-
-    if data['ID'] == None:
-        data['ID'] = [book_id]
-    else:
-        data['ID'].append(book_id)
-    
-    if data['Bookshelf'] == None:
-        data['Bookshelf'] = [row['Bookshelf']]
-    else:
-        data['Bookshelf'].append(row['Bookshelf'])
-
-    text = np.nan
+    # escaped whitespace becomes a space, any other stray backslash is dropped
+    text = text.replace('\\n', ' ').replace('\\r', ' ').replace('\\t', ' ').replace('\\', '')
+    return remove_funny_tokens(text)
+
+MIRROR = 'http://www.mirrorservice.org/sites/ftp.ibiblio.org/pub/docs/books/gutenberg/'
+
+# network/HTTP failures and a missing "Plain Text UTF-8" link; anything else is a bug
+FETCH_ERRORS = (requests.RequestException, UnknownDownloadUriException, OSError, ValueError, IndexError)
+
+def _fetch_text(book_id, link):
+    try:
+        return strip_headers(load_etext(etextno=int(book_id), mirror=MIRROR)).strip()
+    except FETCH_ERRORS:
+        pass
+
     try:
-        text = strip_headers(load_etext(etextno=book_id, 
-                                        mirror='http://www.mirrorservice.org/sites/ftp.ibiblio.org/pub/docs/books/gutenberg/')).strip()
-        text = ' '.join(' '.join(' '.join(text.split('\n')).split('\t')).split('\r'))
-        text = ' '.join(text.split())
-        text = clean_text(str(text))
-    except:
-        try: 
-            page = requests.get(row['Link'])
-            soup = BeautifulSoup(page.content, 'html.parser')
-            text_link = 'http://www.gutenberg.org' + soup.find_all("a", string="Plain Text UTF-8")[0]['href']
-            http_response_object = urlopen(text_link)
-
-            text = strip_headers(str(http_response_object.read()))
-            text = ' '.join(' '.join(' '.join(text.split('\n')).split('\t')).split('\r'))
-            text = ' '.join(text.split())
-            text = clean_text(str(text))
-        except:
-            print("Couldn't acquire text for " + row['Title'] + ' with ID ' + str(book_id) + '. Link: ' + row['Link'])
-            
-    if data['Text'] == None:
-        data['Text'] = [' '.join(text.split(' '))]
-    else:
-        try:
-            data['Text'].append(' '.join(text.split(' ')))
-        except:
-            data['Text'].append(None)
-            print("Couldn't save data for " + row['Title'] + ' with ID ' + str(book_id) + '. Link: ' + row['Link'])
-
-df_data = pd.DataFrame(data, columns = ['Title', 'Author', 'Link', 'ID', 'Bookshelf', 'Text'])
-
-df_data.to_csv('/content/gutenberg_data.csv', index=False)
\ No newline at end of file
+        page = requests.get(link)
+        soup = BeautifulSoup(page.content, 'html.parser')
+        text_link = 'http://www.gutenberg.org' + soup.find_all("a", string="Plain Text UTF-8")[0]['href']
+        return strip_headers(str(urlopen(text_link).read()))
+    except FETCH_ERRORS:
+        return None
+
+def fetch_text_for(book_id, link, title):
+    text = _fetch_text(book_id, link)
+    if text is None:
+        print("Couldn't acquire text for " + title + ' with ID ' + str(book_id) + '. Link: ' + link)
+        return None
+    return clean_text(' '.join(text.split()))
+
+# keep_default_na=False leaves missing cells as '' so they are written like to_csv did
+df_metadata = pd.read_csv('gutenberg_metadata.csv', keep_default_na=False)
+ids = df_metadata['Link'].str.extract(_TRAILING_ID_RE, expand=False).astype(np.int64)
+
+# each book is almost entirely network wait, so overlap the downloads; a sliding
+# window keeps at most MAX_IN_FLIGHT books submitted but not yet written, and rows
+# are written in catalog order as the oldest of them completes
+MAX_IN_FLIGHT = 64
+
+def _write_oldest(w, pending):
+    row, future = pending.popleft()
+    w.writerow(row + [future.result()])
+
+rows = zip(df_metadata['Title'], df_metadata['Author'], df_metadata['Link'], ids, df_metadata['Bookshelf'])
+
+with open('/content/gutenberg_data.csv', 'w', newline='', encoding='utf-8') as fh, \
+        ThreadPoolExecutor(max_workers=16) as ex:
+    w = csv.writer(fh)
+    w.writerow(['Title', 'Author', 'Link', 'ID', 'Bookshelf', 'Text'])
+    pending = deque()
+    for title, author, link, book_id, bookshelf in rows:
+        if len(pending) >= MAX_IN_FLIGHT:
+            _write_oldest(w, pending)
+        pending.append(([title, author, link, book_id, bookshelf],
+                        ex.submit(fetch_text_for, book_id, link, title)))
+    while pending:
+        _write_oldest(w, pending)
@@ -24,6 +24,7 @@ imported, it will raise a helpful error.
 
 from __future__ import annotations
 import argparse
+import functools
 import logging
 from pathlib import Path
 import sys
@@ -32,7 +33,13 @@ import importlib.util
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
+# Make the sibling script importable so the normal import path below succeeds
+_SCRIPTS_DIR = str(Path(__file__).resolve().parent)
+if _SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, _SCRIPTS_DIR)
+
 # Try importing the function from the sibling script
+@functools.lru_cache(maxsize=1)
 def load_process_func():
     try:
         # First try normal import (when scripts/ is on sys.path)
@@ -85,7 +92,7 @@ def main():
         sys.exit(2)
 
     # Call the processing function
-    saved = process(url, output_dir)
+    saved = process(url, output_dir, overwrite=args.overwrite)
     if not saved:
         logging.error("Failed to download/convert the Gutenberg ebook")
         sys.exit(1)
@@ -96,7 +103,6 @@ def main():
     else:
         logging.info(f"Processing reported saved path: {saved}")
 
-    # If file exists and overwrite was requested, nothing else to do (process handles overwrite by filename)
 
 if __name__ == '__main__':
     main()
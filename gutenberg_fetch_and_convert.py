@@ -12,7 +12,7 @@ Usage:
   python scripts\gutenberg_fetch_and_convert.py <gutenberg_url> --output-dir data/pdfs
 
 Dependencies:
-  pip install requests beautifulsoup4 fpdf PyPDF2
+  pip install requests beautifulsoup4 fpdf PyPDF2 lxml
 
 Notes:
 - Project Gutenberg sometimes provides direct PDF/EPUB files in the "Download This eBook" area.
@@ -22,10 +22,15 @@ Notes:
 from __future__ import annotations
 import argparse
 import logging
+import os
 import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 from fpdf import FPDF
 import unicodedata
@@ -34,8 +39,28 @@ import time
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
+# lxml parses much faster than the pure-Python html.parser; use it when installed
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
 HEADERS = {"User-Agent": "AI-Virtual-Library/1.0 (+https://example.org)"}
 
+# Shared keep-alive session so repeated requests to gutenberg.org reuse connections
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+_ADAPTER = HTTPAdapter(pool_connections=8, pool_maxsize=16,
+                       max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]))
+SESSION.mount('https://', _ADAPTER)
+SESSION.mount('http://', _ADAPTER)
+
+_SANITIZE_RE = re.compile(r"[^A-Za-z0-9 _\-\.]+")
+_EBOOK_ID_RE = re.compile(r"/ebooks/(\d+)")
+_TITLE_RE = re.compile(r"^\s*Title\s*[:\-]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+_AUTHOR_RE = re.compile(r"^\s*Author\s*[:\-]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+
 
 def ensure_output_dir(path: Path) -> Path:
     path.mkdir(parents=True, exist_ok=True)
@@ -46,12 +71,12 @@ def sanitize_filename(name: str) -> str:
     # Keep it filesystem-safe
     name = name or "book"
     # replace problematic chars
-    return re.sub(r"[^A-Za-z0-9 _\-\.]+", "", name).strip().replace(' ', '_')
+    return _SANITIZE_RE.sub("", name).strip().replace(' ', '_')
 
 
 def fetch_ebook_page(ebook_url: str) -> str | None:
     try:
-        r = requests.get(ebook_url, headers=HEADERS, timeout=15)
+        r = SESSION.get(ebook_url, timeout=15)
         r.raise_for_status()
         return r.text
     except Exception as e:
@@ -59,33 +84,24 @@ def fetch_ebook_page(ebook_url: str) -> str | None:
         return None
 
 
-def find_direct_pdf_on_page(html: str, base_url: str) -> str | None:
-    soup = BeautifulSoup(html, 'html.parser')
-
-    # 1. Look for link or a tags with type application/pdf
-    link = soup.find('a', attrs={'type': 'application/pdf'})
-    if link and link.get('href'):
-        return urljoin(base_url, link['href'])
-
-    # 2. Look for anchors whose text mentions PDF
-    for a in soup.find_all('a', href=True):
-        txt = (a.get_text() or '').strip().lower()
-        href = a['href']
-        if 'pdf' in txt or href.lower().endswith('.pdf') or 'format=pdf' in href.lower():
-            return urljoin(base_url, href)
-
-    # 3. Some Gutenberg pages include a link list with class 'download'
-    for a in soup.select('a[href]'):
-        href = a['href']
-        if href and href.lower().endswith('.pdf'):
-            return urljoin(base_url, href)
+_PDF_LINK_SELECTOR = ('a[type="application/pdf"][href], a[href$=".pdf" i], '
+                      'a[href$=".pdf.images" i], a[href*="format=pdf" i]')
 
-    return None
+
+def find_direct_pdf_on_soup(soup: BeautifulSoup, base_url: str) -> str | None:
+    # Gutenberg's "Download This eBook" table links PDFs by type or file suffix,
+    # so one compiled selector finds it in a single tree walk
+    a = soup.select_one(_PDF_LINK_SELECTOR)
+    return urljoin(base_url, a['href']) if a and a['href'] else None
+
+
+def find_direct_pdf_on_page(html: str, base_url: str) -> str | None:
+    return find_direct_pdf_on_soup(BeautifulSoup(html, HTML_PARSER), base_url)
 
 
 def _gutenberg_text_candidates(ebook_url: str) -> list[str]:
     # Try to extract the ebook id from /ebooks/<id>
-    m = re.search(r"/ebooks/(\d+)", ebook_url)
+    m = _EBOOK_ID_RE.search(ebook_url)
     candidates: list[str] = []
     if m:
         eid = m.group(1)
@@ -100,20 +116,76 @@ def _gutenberg_text_candidates(ebook_url: str) -> list[str]:
     return candidates
 
 
+def _fetch_candidate_text(url: str, timeout: int) -> str | None:
+    try:
+        r = SESSION.get(url, timeout=timeout)
+        if r.status_code == 200 and r.text and len(r.text.strip()) > 100:
+            return r.text
+    except Exception:
+        pass
+    return None
+
+
+# HEAD answers that reliably mean the file does not exist
+_MISSING_STATUSES = frozenset({404, 410})
+
+
+def _probe_status(url: str, timeout: int) -> int | None:
+    try:
+        return SESSION.head(url, timeout=timeout, allow_redirects=True).status_code
+    except Exception:
+        return None
+
+
 def fetch_gutenberg_text(ebook_url: str, timeout: int = 20) -> str | None:
-    for url in _gutenberg_text_candidates(ebook_url):
-        try:
-            r = requests.get(url, headers=HEADERS, timeout=timeout)
-            if r.status_code == 200 and r.text and len(r.text.strip()) > 100:
+    # HEAD all candidates concurrently and skip only URLs the server says are
+    # gone; a failed probe, 405 or any other status still gets a GET. Candidates
+    # are tried in listed order so the ebook page itself is only used when no
+    # .txt URL works
+    candidates = _gutenberg_text_candidates(ebook_url)
+    pool = ThreadPoolExecutor(max_workers=len(candidates))
+    try:
+        probes = [pool.submit(_probe_status, url, timeout) for url in candidates]
+        for url, probe in zip(candidates, probes):
+            if probe.result() in _MISSING_STATUSES:
+                continue
+            text = _fetch_candidate_text(url, timeout)
+            if text:
                 logging.info(f"Fetched text from: {url}")
-                return r.text
-        except Exception:
-            time.sleep(0.5)
-            continue
+                return text
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
     logging.warning("Could not find plain text using common Gutenberg patterns")
     return None
 
 
+_QUOTE_TABLE = str.maketrans({'\u2018': "'", '\u2019': "'", '\u201c': '"', '\u201d': '"'})
+
+
+def iter_paragraphs(text: str):
+    # Yield blank-line separated paragraphs without building the whole list
+    start = 0
+    i = text.find('\n\n')
+    while i != -1:
+        yield text[start:i]
+        start = i + 2
+        i = text.find('\n\n', start)
+    yield text[start:]
+
+
+# Common system font locations
+_FONT_CANDIDATES = [
+    r"C:\Windows\Fonts\DejaVuSans.ttf",
+    r"C:\Windows\Fonts\arial.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+]
+
+# fonts/font_files entries of the first Unicode font FPDF registered, reused by
+# later SimpleTextPDF instances so the TTF metrics are loaded once per process
+_UNICODE_FONT_CACHE: dict = {}
+
+
 class SimpleTextPDF(FPDF):
     def __init__(self, title: str = '', author: str = '', *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -122,28 +194,44 @@ class SimpleTextPDF(FPDF):
         self.set_auto_page_break(auto=True, margin=15)
         # Try to add a TrueType font that supports Unicode
         self._unicode_font = None
+        if self._install_cached_font():
+            self._unicode_font = 'DejaVuUnicode'
+            return
         font_paths = []
         # Allow overriding via env var
-        from os import environ
-        if environ.get('PDF_FONT_PATH'):
-            font_paths.append(environ.get('PDF_FONT_PATH'))
-        # Common system font locations
-        font_paths += [
-            r"C:\Windows\Fonts\DejaVuSans.ttf",
-            r"C:\Windows\Fonts\arial.ttf",
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-            "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-        ]
+        if os.environ.get('PDF_FONT_PATH'):
+            font_paths.append(os.environ.get('PDF_FONT_PATH'))
+        font_paths += _FONT_CANDIDATES
         for p in font_paths:
             try:
                 if p and Path(p).exists():
                     # Register font as 'DejaVuUnicode'
                     self.add_font('DejaVuUnicode', '', p, uni=True)
                     self._unicode_font = 'DejaVuUnicode'
+                    self._cache_font(p)
                     break
             except Exception:
                 continue
 
+    def _cache_font(self, path: str):
+        # Only PyFPDF 1.7 keeps fonts as plain dicts; other backends parse per instance
+        font = self.fonts.get('dejavuunicode')
+        if isinstance(font, dict) and 'dejavuunicode' in self.font_files:
+            _UNICODE_FONT_CACHE.update(
+                font=dict(font, subset=list(font['subset'])),
+                files={'dejavuunicode': dict(self.font_files['dejavuunicode']), path: {'type': 'TTF'}},
+            )
+
+    def _install_cached_font(self) -> bool:
+        if not _UNICODE_FONT_CACHE:
+            return False
+        font = _UNICODE_FONT_CACHE['font']
+        # 'subset' collects the glyphs used by this document, so each PDF gets its own copy
+        self.fonts['dejavuunicode'] = dict(font, i=len(self.fonts) + 1, subset=list(font['subset']))
+        for key, entry in _UNICODE_FONT_CACHE['files'].items():
+            self.font_files[key] = dict(entry)
+        return True
+
     def header(self):
         # optional header with title
         if self.title:
@@ -163,29 +251,28 @@ class SimpleTextPDF(FPDF):
             self.set_font(self._unicode_font, size=12)
         else:
             self.set_font('Times', size=12)
-        # Split into paragraphs to preserve some structure
-        paragraphs = text.split('\n\n')
-        for p in paragraphs:
+        # If we don't have a unicode font, normalize some common smart quotes
+        if not self._unicode_font:
+            text = text.translate(_QUOTE_TABLE)
+        # Walk paragraphs to preserve some structure
+        for p in iter_paragraphs(text):
             p = p.strip('\n')
             if not p.strip():
                 continue
             # wrap lines
-            # If we don't have a unicode font, normalize some common smart quotes
-            if not self._unicode_font:
-                p = p.replace('\u2018', "'").replace('\u2019', "'")
-                p = p.replace('\u201c', '"').replace('\u201d', '"')
             self.multi_cell(0, 6, p)
             self.ln(2)
 
 
-def text_to_pdf_bytes(text: str, title: str = '', author: str = '') -> bytes:
+def text_to_pdf_file(text: str, out_path: Path, title: str = '', author: str = '') -> Path:
+    # FPDF writes the /Title and /Author info dict itself, so the PDF goes straight
+    # to disk with its metadata and never needs a second read/rewrite pass
+    out_path.parent.mkdir(parents=True, exist_ok=True)
     pdf = SimpleTextPDF(title=title, author=author)
     pdf.add_text(text)
     try:
-        out = pdf.output(dest='S')
-        if isinstance(out, (bytes, bytearray)):
-            return bytes(out)
-        return out.encode('latin-1')
+        pdf.output(str(out_path), 'F')
+        return out_path
     except UnicodeEncodeError as e:
         # FPDF couldn't encode some characters. Try to normalize to ASCII and retry.
         logging.warning(f"FPDF encoding error: {e}. Attempting ASCII-fallback normalization.")
@@ -193,10 +280,8 @@ def text_to_pdf_bytes(text: str, title: str = '', author: str = '') -> bytes:
             ascii_text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
             pdf2 = SimpleTextPDF(title=title, author=author)
             pdf2.add_text(ascii_text)
-            out2 = pdf2.output(dest='S')
-            if isinstance(out2, (bytes, bytearray)):
-                return bytes(out2)
-            return out2.encode('latin-1')
+            pdf2.output(str(out_path), 'F')
+            return out_path
         except Exception:
             # Last resort: try using reportlab if available (better UTF-8 support)
             try:
@@ -205,9 +290,9 @@ def text_to_pdf_bytes(text: str, title: str = '', author: str = '') -> bytes:
             except Exception:
                 raise
 
-            from io import BytesIO
-            buffer = BytesIO()
-            c = canvas.Canvas(buffer, pagesize=letter)
+            c = canvas.Canvas(str(out_path), pagesize=letter)
+            c.setTitle(title or '')
+            c.setAuthor(author or '')
             width, height = letter
             # Simple layout: title and author, then body text
             y = height - 72
@@ -232,18 +317,11 @@ def text_to_pdf_bytes(text: str, title: str = '', author: str = '') -> bytes:
                 text_obj.textLine(line[:1000])
             c.drawText(text_obj)
             c.save()
-            pdf_bytes = buffer.getvalue()
-            buffer.close()
-            return pdf_bytes
+            return out_path
 
 
-def save_pdf_bytes_with_metadata(pdf_bytes: bytes, out_path: Path, title: str = '', author: str = '') -> Path:
-    # First write the bytes
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(out_path, 'wb') as f:
-        f.write(pdf_bytes)
-
-    # Add metadata using PyPDF2
+def set_pdf_metadata(out_path: Path, title: str = '', author: str = '') -> Path:
+    # Only needed for PDFs we did not render ourselves (e.g. direct downloads)
     try:
         reader = PdfReader(str(out_path))
         writer = PdfWriter()
@@ -266,27 +344,81 @@ def save_pdf_bytes_with_metadata(pdf_bytes: bytes, out_path: Path, title: str =
 def download_file(url: str, out_path: Path, timeout: int = 30) -> bool:
     try:
         logging.info(f"Downloading file: {url}")
-        r = requests.get(url, headers=HEADERS, timeout=timeout, stream=True)
+        r = SESSION.get(url, timeout=timeout, stream=True)
         r.raise_for_status()
         out_path.parent.mkdir(parents=True, exist_ok=True)
+        # Let urllib3 undo any Content-Encoding, then copy in 1 MiB blocks
+        r.raw.decode_content = True
         with open(out_path, 'wb') as fh:
-            for chunk in r.iter_content(chunk_size=8192):
-                if chunk:
-                    fh.write(chunk)
+            shutil.copyfileobj(r.raw, fh, length=1 << 20)
         return True
     except Exception as e:
         logging.error(f"Failed to download {url}: {e}")
         return False
 
 
-def process_gutenberg_url(ebook_url: str, output_dir: Path) -> Path | None:
+def _id_output_path(ebook_url: str, output_dir: Path) -> Path | None:
+    # Name the output after the ebook id when the URL has one, so a rerun can
+    # skip books that are already on disk without fetching anything
+    m = _EBOOK_ID_RE.search(ebook_url)
+    return output_dir / f"gutenberg_{m.group(1)}.pdf" if m else None
+
+
+def _already_done(id_path: Path | None, overwrite: bool) -> bool:
+    if id_path is not None and id_path.exists() and not overwrite:
+        logging.info(f"PDF already exists, skipping: {id_path}")
+        return True
+    return False
+
+
+def process_gutenberg_url(ebook_url: str, output_dir: Path, overwrite: bool = False) -> Path | None:
     logging.info(f"Processing: {ebook_url}")
-    html = fetch_ebook_page(ebook_url)
+    id_path = _id_output_path(ebook_url, output_dir)
+    if _already_done(id_path, overwrite):
+        return id_path
+    return _process_ebook_page(ebook_url, fetch_ebook_page(ebook_url), output_dir, id_path)
+
+
+def process_gutenberg_urls(ebook_urls: list[str], output_dir: Path, overwrite: bool = False,
+                           fetch_workers: int = 16) -> list[Path | None]:
+    # Batch version of process_gutenberg_url: ebook pages are downloaded by an
+    # I/O pool and each one is handed to a parse/convert pool as soon as it
+    # arrives, so page downloads overlap HTML parsing and PDF generation.
+    results: dict[str, Path | None] = {}
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetchers, \
+            ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as workers:
+        pages = {}
+        for url in dict.fromkeys(ebook_urls):
+            id_path = _id_output_path(url, output_dir)
+            if _already_done(id_path, overwrite):
+                results[url] = id_path
+            else:
+                pages[fetchers.submit(fetch_ebook_page, url)] = (url, id_path)
+
+        jobs = {}
+        for fut in as_completed(pages):
+            url, id_path = pages[fut]
+            logging.info(f"Processing: {url}")
+            jobs[workers.submit(_process_ebook_page, url, fut.result(), output_dir, id_path)] = url
+
+        for fut in as_completed(jobs):
+            url = jobs[fut]
+            try:
+                results[url] = fut.result()
+            except Exception as e:
+                logging.error(f"Failed to process {url}: {e}")
+                results[url] = None
+
+    return [results[url] for url in ebook_urls]
+
+
+def _process_ebook_page(ebook_url: str, html: str | None, output_dir: Path,
+                        id_path: Path | None) -> Path | None:
     title = ''
     author = ''
 
     if html:
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = BeautifulSoup(html, HTML_PARSER)
         # Try to extract title and author from meta tags or page header
         if soup.title and soup.title.string:
             title = soup.title.string.strip()
@@ -303,20 +435,17 @@ def process_gutenberg_url(ebook_url: str, output_dir: Path) -> Path | None:
             author = h2.get_text().strip()
 
         # Look for direct PDF link
-        pdf_link = find_direct_pdf_on_page(html, ebook_url)
+        pdf_link = find_direct_pdf_on_soup(soup, ebook_url)
         if pdf_link:
             logging.info(f"Found direct PDF link: {pdf_link}")
             parsed = urlparse(pdf_link)
             filename = Path(parsed.path).name or sanitize_filename(title or 'book') + '.pdf'
-            out_path = output_dir / filename
+            out_path = id_path or output_dir / filename
             ok = download_file(pdf_link, out_path)
             if ok:
                 logging.info(f"Saved remote PDF to: {out_path}")
                 # attempt to set metadata
-                try:
-                    save_pdf_bytes_with_metadata(out_path.read_bytes(), out_path, title=title, author=author)
-                except Exception:
-                    pass
+                set_pdf_metadata(out_path, title=title, author=author)
                 return out_path
 
     # If we didn't find a PDF, try to fetch plain text
@@ -329,8 +458,8 @@ def process_gutenberg_url(ebook_url: str, output_dir: Path) -> Path | None:
     if not title or not author:
         # look for Title and Author lines in first 2000 chars
         head = text[:2000]
-        m_title = re.search(r"^\s*Title\s*[:\-]\s*(.+)$", head, re.IGNORECASE | re.MULTILINE)
-        m_author = re.search(r"^\s*Author\s*[:\-]\s*(.+)$", head, re.IGNORECASE | re.MULTILINE)
+        m_title = _TITLE_RE.search(head)
+        m_author = _AUTHOR_RE.search(head)
         if m_title:
             title = m_title.group(1).strip()
         if m_author:
@@ -339,10 +468,9 @@ def process_gutenberg_url(ebook_url: str, output_dir: Path) -> Path | None:
     if not title:
         title = f"gutenberg_{int(time.time())}"
     base = sanitize_filename(f"{title} - {author}")
-    out_path = output_dir / f"{base}.pdf"
+    out_path = id_path or output_dir / f"{base}.pdf"
 
-    pdf_bytes = text_to_pdf_bytes(text, title=title, author=author)
-    saved = save_pdf_bytes_with_metadata(pdf_bytes, out_path, title=title, author=author)
+    saved = text_to_pdf_file(text, out_path, title=title, author=author)
     logging.info(f"Saved PDF: {saved}")
     return saved
 
@@ -351,10 +479,11 @@ def main():
     parser = argparse.ArgumentParser(description='Fetch Project Gutenberg book (PDF or text) and generate a PDF with metadata')
     parser.add_argument('url', help='Project Gutenberg ebook page URL (e.g. https://www.gutenberg.org/ebooks/1342)')
     parser.add_argument('--output-dir', '-o', default='data/pdfs', help='Directory where PDFs will be saved')
+    parser.add_argument('--overwrite', action='store_true', help='Re-download and overwrite an existing PDF')
     args = parser.parse_args()
 
     outdir = ensure_output_dir(Path(args.output_dir))
-    res = process_gutenberg_url(args.url, outdir)
+    res = process_gutenberg_url(args.url, outdir, overwrite=args.overwrite)
     if res:
         logging.info(f"Done: {res}")
     else:
@@ -2,44 +2,280 @@
 Mood-Based Recommendation Module
 AI suggests books or stories based on the reader's mood
 """
-from typing import List, Dict, Optional
+from collections import Counter
+import functools
+import re
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Tuple
+import numpy as np
 import pandas as pd
-from textblob import TextBlob
+
+try:
+    import ahocorasick
+except ImportError:  # optional: per-mood regexes are used instead
+    ahocorasick = None
+
+# Source of the random top-up picks in get_mood_recommendations
+_rng = np.random.default_rng()
+
+
+def _frozen(table):
+    """Read-only view of a {mood: {field: text}} table"""
+    return MappingProxyType({mood: MappingProxyType(info) for mood, info in table.items()})
+
+
+# Static per-mood texts, built once at import and served read-only
+_MOOD_DESCRIPTIONS = _frozen({
+    "happy": {
+        "emoji": "😊",
+        "description": "Feeling great! Let's keep that positive energy going.",
+        "book_types": "uplifting stories, comedies, and feel-good adventures"
+    },
+    "sad": {
+        "emoji": "😢",
+        "description": "It's okay to feel down. Sometimes a good book helps.",
+        "book_types": "meaningful stories, poetry, and thoughtful narratives"
+    },
+    "excited": {
+        "emoji": "🤩",
+        "description": "Lots of energy! Perfect time for action-packed reads.",
+        "book_types": "thrillers, adventures, and page-turners"
+    },
+    "calm": {
+        "emoji": "😌",
+        "description": "In a peaceful state. Enjoy some gentle reading.",
+        "book_types": "poetry, philosophy, and serene stories"
+    },
+    "curious": {
+        "emoji": "🤔",
+        "description": "Eager to learn! Great time to explore new topics.",
+        "book_types": "mysteries, science fiction, and informative reads"
+    },
+    "romantic": {
+        "emoji": "💕",
+        "description": "Feeling the love! Dive into heartfelt stories.",
+        "book_types": "romance novels, love poems, and emotional dramas"
+    },
+    "anxious": {
+        "emoji": "😰",
+        "description": "Feeling stressed? Let's find something soothing.",
+        "book_types": "light fiction, humor, and comforting reads"
+    },
+    "motivated": {
+        "emoji": "💪",
+        "description": "Ready to conquer! Time for inspiring content.",
+        "book_types": "biographies, self-help, and motivational stories"
+    },
+    "nostalgic": {
+        "emoji": "🌅",
+        "description": "Looking back fondly. Classic stories await.",
+        "book_types": "classics, historical fiction, and timeless tales"
+    },
+    "adventurous": {
+        "emoji": "🗺️",
+        "description": "Seeking thrills! Adventure calls.",
+        "book_types": "adventure stories, travel tales, and daring narratives"
+    }
+})
+
+_DEFAULT_DESCRIPTION = MappingProxyType({
+    "emoji": "📚",
+    "description": "Every mood deserves a good book!",
+    "book_types": "a wide variety of engaging stories"
+})
+
+_MOOD_ACTIVITIES = _frozen({
+    "happy": {
+        "duration": "30-60 minutes",
+        "environment": "Anywhere comfortable",
+        "suggestion": "Read something fun and lighthearted. Share favorite quotes with friends!"
+    },
+    "sad": {
+        "duration": "As long as needed",
+        "environment": "Cozy, quiet space",
+        "suggestion": "Take your time. It's okay to cry while reading. Let the story comfort you."
+    },
+    "excited": {
+        "duration": "Quick sessions",
+        "environment": "Can move around",
+        "suggestion": "Dive into action scenes. Read standing up or while walking if needed!"
+    },
+    "calm": {
+        "duration": "Extended periods",
+        "environment": "Peaceful, undisturbed",
+        "suggestion": "Savor each word. Maybe read with calming music or tea."
+    },
+    "curious": {
+        "duration": "Focus sessions",
+        "environment": "Distraction-free zone",
+        "suggestion": "Take notes, look up references, explore deeply!"
+    },
+    "romantic": {
+        "duration": "Evening reading",
+        "environment": "Comfortable, ambient lighting",
+        "suggestion": "Create a romantic atmosphere. Dim lights, comfortable seating."
+    },
+    "anxious": {
+        "duration": "Short, frequent breaks",
+        "environment": "Safe, familiar space",
+        "suggestion": "Read in small chunks. It's okay to pause. Choose familiar favorites."
+    },
+    "motivated": {
+        "duration": "Productive sessions",
+        "environment": "Energizing space",
+        "suggestion": "Highlight key passages. Set reading goals. Apply what you learn!"
+    },
+    "nostalgic": {
+        "duration": "Leisurely pace",
+        "environment": "Meaningful location",
+        "suggestion": "Reread old favorites. Reflect on memories triggered by the story."
+    },
+    "adventurous": {
+        "duration": "Immersive reading",
+        "environment": "New or unusual places",
+        "suggestion": "Try reading outdoors or in a new café. Let the story transport you!"
+    }
+})
+
+_DEFAULT_ACTIVITY = MappingProxyType({
+    "duration": "Your preference",
+    "environment": "Wherever you feel comfortable",
+    "suggestion": "Read at your own pace and enjoy!"
+})
+
 
 class MoodRecommender:
     """Recommend books based on user mood"""
     
     # Mood to genre mapping
     MOOD_GENRE_MAP = {
-        "happy": ["Comedy", "Romance", "Adventure", "Children's Literature"],
-        "sad": ["Drama", "Literary Fiction", "Poetry", "Philosophy"],
-        "excited": ["Action", "Adventure", "Science Fiction", "Thriller"],
-        "calm": ["Poetry", "Philosophy", "Nature", "Spirituality"],
-        "curious": ["Science Fiction", "Mystery", "Historical", "Biography"],
-        "romantic": ["Romance", "Poetry", "Love Stories", "Drama"],
-        "anxious": ["Self-Help", "Philosophy", "Humor", "Light Fiction"],
-        "motivated": ["Biography", "Self-Help", "Business", "Inspirational"],
-        "nostalgic": ["Classics", "Historical Fiction", "Memoir", "Poetry"],
-        "adventurous": ["Adventure", "Travel", "Action", "Fantasy"]
+        "happy": ("Comedy", "Romance", "Adventure", "Children's Literature"),
+        "sad": ("Drama", "Literary Fiction", "Poetry", "Philosophy"),
+        "excited": ("Action", "Adventure", "Science Fiction", "Thriller"),
+        "calm": ("Poetry", "Philosophy", "Nature", "Spirituality"),
+        "curious": ("Science Fiction", "Mystery", "Historical", "Biography"),
+        "romantic": ("Romance", "Poetry", "Love Stories", "Drama"),
+        "anxious": ("Self-Help", "Philosophy", "Humor", "Light Fiction"),
+        "motivated": ("Biography", "Self-Help", "Business", "Inspirational"),
+        "nostalgic": ("Classics", "Historical Fiction", "Memoir", "Poetry"),
+        "adventurous": ("Adventure", "Travel", "Action", "Fantasy")
     }
     
     # Keywords for mood detection
     MOOD_KEYWORDS = {
-        "happy": ["happy", "joyful", "cheerful", "excited", "pleased", "delighted"],
-        "sad": ["sad", "down", "depressed", "lonely", "melancholy", "blue"],
-        "excited": ["excited", "thrilled", "energized", "pumped", "enthusiastic"],
-        "calm": ["calm", "peaceful", "relaxed", "serene", "tranquil", "quiet"],
-        "curious": ["curious", "interested", "wondering", "intrigued", "fascinated"],
-        "romantic": ["romantic", "loving", "affectionate", "tender", "passionate"],
-        "anxious": ["anxious", "worried", "stressed", "nervous", "tense"],
-        "motivated": ["motivated", "inspired", "driven", "ambitious", "determined"],
-        "nostalgic": ["nostalgic", "reminiscent", "sentimental", "wistful"],
-        "adventurous": ["adventurous", "daring", "bold", "brave", "exploring"]
+        "happy": frozenset({"happy", "joyful", "cheerful", "excited", "pleased", "delighted"}),
+        "sad": frozenset({"sad", "down", "depressed", "lonely", "melancholy", "blue"}),
+        "excited": frozenset({"excited", "thrilled", "energized", "pumped", "enthusiastic"}),
+        "calm": frozenset({"calm", "peaceful", "relaxed", "serene", "tranquil", "quiet"}),
+        "curious": frozenset({"curious", "interested", "wondering", "intrigued", "fascinated"}),
+        "romantic": frozenset({"romantic", "loving", "affectionate", "tender", "passionate"}),
+        "anxious": frozenset({"anxious", "worried", "stressed", "nervous", "tense"}),
+        "motivated": frozenset({"motivated", "inspired", "driven", "ambitious", "determined"}),
+        "nostalgic": frozenset({"nostalgic", "reminiscent", "sentimental", "wistful"}),
+        "adventurous": frozenset({"adventurous", "daring", "bold", "brave", "exploring"})
     }
     
+    _ALL_MOODS = tuple(MOOD_GENRE_MAP)
+    
+    # Aho-Corasick automaton over MOOD_KEYWORDS, built once per process
+    _automaton = None
+    
+    # mood -> case-insensitive alternation of its keywords (no-automaton fallback)
+    _mood_patterns = None
+    
+    # (keyword -> column, keyword x mood incidence matrix) for batch scoring
+    _keyword_table = None
+    
     def __init__(self):
         """Initialize mood recommender"""
-        pass
+        # mood -> compiled case-insensitive alternation of its genres
+        self._genre_patterns = {}
+    
+    def _genre_pattern(self, mood: str):
+        """Compiled regex matching any of the mood's genres, cached per mood"""
+        pattern = self._genre_patterns.get(mood)
+        if pattern is None:
+            genres = self.MOOD_GENRE_MAP.get(mood, ("General",))
+            pattern = re.compile('|'.join(map(re.escape, genres)), re.IGNORECASE)
+            self._genre_patterns[mood] = pattern
+        return pattern
+    
+    @classmethod
+    def _get_automaton(cls):
+        """Build (once) the keyword automaton, or None if pyahocorasick is missing"""
+        if ahocorasick is None:
+            return None
+        if cls._automaton is None:
+            # A keyword may belong to several moods ("excited"), so map it to all of them
+            keyword_moods = {}
+            for mood, keywords in cls.MOOD_KEYWORDS.items():
+                for keyword in keywords:
+                    keyword_moods.setdefault(keyword, []).append(mood)
+            # Keywords are lowercase; texts are lowercased before the scan
+            automaton = ahocorasick.Automaton()
+            for keyword, moods in keyword_moods.items():
+                automaton.add_word(keyword, (keyword, tuple(moods)))
+            automaton.make_automaton()
+            cls._automaton = automaton
+        return cls._automaton
+    
+    @classmethod
+    def _get_mood_patterns(cls):
+        """Build (once) one compiled keyword regex per mood"""
+        if cls._mood_patterns is None:
+            cls._mood_patterns = {
+                mood: re.compile('|'.join(map(re.escape, sorted(keywords, key=len, reverse=True))),
+                                 re.IGNORECASE)
+                for mood, keywords in cls.MOOD_KEYWORDS.items()
+            }
+        return cls._mood_patterns
+    
+    @classmethod
+    def _get_keyword_table(cls):
+        """Build (once) the keyword columns and keyword-to-mood incidence matrix"""
+        if cls._keyword_table is None:
+            moods = list(cls.MOOD_KEYWORDS)
+            columns = {}
+            for keywords in cls.MOOD_KEYWORDS.values():
+                for keyword in keywords:
+                    columns.setdefault(keyword, len(columns))
+            incidence = np.zeros((len(columns), len(moods)), dtype=np.int32)
+            for j, keywords in enumerate(cls.MOOD_KEYWORDS.values()):
+                for keyword in keywords:
+                    incidence[columns[keyword], j] = 1
+            cls._keyword_table = (columns, incidence)
+        return cls._keyword_table
+    
+    def detect_moods_batch(self, texts: List[str]) -> List[str]:
+        """
+        Detect the mood of many texts at once
+        
+        Args:
+            texts: User texts (reviews, journal entries, ...)
+        
+        Returns:
+            Detected mood for each text, same as detect_mood_from_text
+        """
+        columns, incidence = self._get_keyword_table()
+        automaton = self._get_automaton()
+        
+        # Which keywords occur in each text, then score every text in one product
+        hits = np.zeros((len(texts), len(columns)), dtype=np.int32)
+        for i, text in enumerate(texts):
+            if automaton is not None:
+                found = {keyword for _, (keyword, _) in automaton.iter(text.lower())}
+            else:
+                found = {match.lower() for pattern in self._get_mood_patterns().values()
+                         for match in pattern.findall(text)}
+            for keyword in found:
+                hits[i, columns[keyword]] = 1
+        scores = hits @ incidence
+        
+        # argmax keeps the first of tied moods, like max() over the score dict
+        moods = list(self.MOOD_KEYWORDS)
+        best = scores.argmax(axis=1)
+        return [moods[b] if scores[i, b] else self._detect_mood(text)
+                for i, (text, b) in enumerate(zip(texts, best))]
     
     def detect_mood_from_text(self, text: str) -> str:
         """
@@ -51,20 +287,33 @@ class MoodRecommender:
         Returns:
             Detected mood
         """
-        text_lower = text.lower()
-        
+        return self._detect_mood(text)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=2048)
+    def _detect_mood(cls, text: str) -> str:
+        """Memoized body of detect_mood_from_text (the result depends only on text)"""
         # Check for keyword matches
-        mood_scores = {}
-        for mood, keywords in self.MOOD_KEYWORDS.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            if score > 0:
-                mood_scores[mood] = score
+        automaton = cls._get_automaton()
+        if automaton is not None:
+            # One pass over the text finds every keyword; each keyword counts once
+            matched = {kw_moods for _, kw_moods in automaton.iter(text.lower())}
+            counts = Counter(mood for _, moods in matched for mood in moods)
+            mood_scores = {mood: counts[mood] for mood in cls.MOOD_KEYWORDS if counts[mood]}
+        else:
+            # One regex pass per mood; each distinct keyword counts once
+            mood_scores = {}
+            for mood, pattern in cls._get_mood_patterns().items():
+                score = len({match.lower() for match in pattern.findall(text)})
+                if score > 0:
+                    mood_scores[mood] = score
         
         # Return mood with highest score
         if mood_scores:
             return max(mood_scores, key=mood_scores.get)
         
-        # Fallback: use sentiment analysis
+        # Fallback: use sentiment analysis (TextBlob/NLTK is only loaded if needed)
+        from textblob import TextBlob
         blob = TextBlob(text)
         polarity = blob.sentiment.polarity
         
@@ -78,7 +327,8 @@ class MoodRecommender:
             return "curious"
     
     def get_mood_recommendations(self, books_df: pd.DataFrame, mood: str, 
-                                 limit: int = 10) -> pd.DataFrame:
+                                 limit: int = 10,
+                                 indices: Optional[Mapping] = None) -> pd.DataFrame:
         """
         Get book recommendations based on mood
         
@@ -86,37 +336,44 @@ class MoodRecommender:
             books_df: DataFrame with book data
             mood: User's mood
             limit: Number of recommendations
+            indices: Optional build_indices(books_df), built once for the catalog
         
         Returns:
             DataFrame with recommended books
         """
-        # Get genres for this mood
-        recommended_genres = self.MOOD_GENRE_MAP.get(mood, ["General"])
-        
-        # Filter books by genre
-        recommendations = pd.DataFrame()
-        
-        for genre in recommended_genres:
-            # Case-insensitive search in Bookshelf column
-            if 'Bookshelf' in books_df.columns:
-                matched = books_df[
-                    books_df['Bookshelf'].str.contains(genre, case=False, na=False)
-                ]
-                recommendations = pd.concat([recommendations, matched])
+        # Match the genres against the distinct Bookshelf labels only, then
+        # gather the rows of every matching label
+        pattern = self._genre_pattern(mood)
+        if indices is not None:
+            shelves = indices.get('Bookshelf', {})
+            matched = [rows for label, rows in shelves.items()
+                       if isinstance(label, str) and pattern.search(label)]
+            positions = np.unique(np.concatenate(matched)) if matched else np.empty(0, dtype=np.intp)
+        elif 'Bookshelf' in books_df.columns:
+            shelf = books_df['Bookshelf']
+            labels = [label for label in shelf.unique()
+                      if isinstance(label, str) and pattern.search(label)]
+            positions = np.flatnonzero(shelf.isin(labels).to_numpy())
+        else:
+            positions = np.empty(0, dtype=np.intp)
         
         # Remove duplicates
-        recommendations = recommendations.drop_duplicates(subset=['Title'])
+        titles = books_df['Title'].to_numpy()[positions]
+        picked = positions[~pd.Series(titles).duplicated().to_numpy()][:limit]
         
         # If we don't have enough recommendations, add random books
-        if len(recommendations) < limit:
-            additional = books_df.sample(min(limit - len(recommendations), len(books_df)))
-            recommendations = pd.concat([recommendations, additional])
-            recommendations = recommendations.drop_duplicates(subset=['Title'])
+        needed = limit - len(picked)
+        if needed > 0:
+            mask = np.zeros(len(books_df), dtype=bool)
+            mask[positions] = True
+            others = np.flatnonzero(~mask)
+            extra = _rng.choice(others, size=min(needed, len(others)), replace=False)
+            picked = np.concatenate([picked, extra])
         
         # Return limited results
-        return recommendations.head(limit)
+        return books_df.iloc[picked]
     
-    def get_mood_description(self, mood: str) -> Dict:
+    def get_mood_description(self, mood: str) -> Mapping[str, str]:
         """
         Get description and suggestions for a mood
         
@@ -126,70 +383,13 @@ class MoodRecommender:
         Returns:
             Dictionary with mood information
         """
-        descriptions = {
-            "happy": {
-                "emoji": "😊",
-                "description": "Feeling great! Let's keep that positive energy going.",
-                "book_types": "uplifting stories, comedies, and feel-good adventures"
-            },
-            "sad": {
-                "emoji": "😢",
-                "description": "It's okay to feel down. Sometimes a good book helps.",
-                "book_types": "meaningful stories, poetry, and thoughtful narratives"
-            },
-            "excited": {
-                "emoji": "🤩",
-                "description": "Lots of energy! Perfect time for action-packed reads.",
-                "book_types": "thrillers, adventures, and page-turners"
-            },
-            "calm": {
-                "emoji": "😌",
-                "description": "In a peaceful state. Enjoy some gentle reading.",
-                "book_types": "poetry, philosophy, and serene stories"
-            },
-            "curious": {
-                "emoji": "🤔",
-                "description": "Eager to learn! Great time to explore new topics.",
-                "book_types": "mysteries, science fiction, and informative reads"
-            },
-            "romantic": {
-                "emoji": "💕",
-                "description": "Feeling the love! Dive into heartfelt stories.",
-                "book_types": "romance novels, love poems, and emotional dramas"
-            },
-            "anxious": {
-                "emoji": "😰",
-                "description": "Feeling stressed? Let's find something soothing.",
-                "book_types": "light fiction, humor, and comforting reads"
-            },
-            "motivated": {
-                "emoji": "💪",
-                "description": "Ready to conquer! Time for inspiring content.",
-                "book_types": "biographies, self-help, and motivational stories"
-            },
-            "nostalgic": {
-                "emoji": "🌅",
-                "description": "Looking back fondly. Classic stories await.",
-                "book_types": "classics, historical fiction, and timeless tales"
-            },
-            "adventurous": {
-                "emoji": "🗺️",
-                "description": "Seeking thrills! Adventure calls.",
-                "book_types": "adventure stories, travel tales, and daring narratives"
-            }
-        }
-        
-        return descriptions.get(mood, {
-            "emoji": "📚",
-            "description": "Every mood deserves a good book!",
-            "book_types": "a wide variety of engaging stories"
-        })
+        return _MOOD_DESCRIPTIONS.get(mood, _DEFAULT_DESCRIPTION)
     
-    def get_all_moods(self) -> List[str]:
-        """Get list of all available moods"""
-        return list(self.MOOD_GENRE_MAP.keys())
+    def get_all_moods(self) -> Tuple[str, ...]:
+        """Get all available moods"""
+        return self._ALL_MOODS
     
-    def suggest_reading_activity(self, mood: str) -> Dict:
+    def suggest_reading_activity(self, mood: str) -> Mapping[str, str]:
         """
         Suggest reading activities based on mood
         
@@ -199,61 +399,4 @@ class MoodRecommender:
         Returns:
             Dictionary with activity suggestions
         """
-        activities = {
-            "happy": {
-                "duration": "30-60 minutes",
-                "environment": "Anywhere comfortable",
-                "suggestion": "Read something fun and lighthearted. Share favorite quotes with friends!"
-            },
-            "sad": {
-                "duration": "As long as needed",
-                "environment": "Cozy, quiet space",
-                "suggestion": "Take your time. It's okay to cry while reading. Let the story comfort you."
-            },
-            "excited": {
-                "duration": "Quick sessions",
-                "environment": "Can move around",
-                "suggestion": "Dive into action scenes. Read standing up or while walking if needed!"
-            },
-            "calm": {
-                "duration": "Extended periods",
-                "environment": "Peaceful, undisturbed",
-                "suggestion": "Savor each word. Maybe read with calming music or tea."
-            },
-            "curious": {
-                "duration": "Focus sessions",
-                "environment": "Distraction-free zone",
-                "suggestion": "Take notes, look up references, explore deeply!"
-            },
-            "romantic": {
-                "duration": "Evening reading",
-                "environment": "Comfortable, ambient lighting",
-                "suggestion": "Create a romantic atmosphere. Dim lights, comfortable seating."
-            },
-            "anxious": {
-                "duration": "Short, frequent breaks",
-                "environment": "Safe, familiar space",
-                "suggestion": "Read in small chunks. It's okay to pause. Choose familiar favorites."
-            },
-            "motivated": {
-                "duration": "Productive sessions",
-                "environment": "Energizing space",
-                "suggestion": "Highlight key passages. Set reading goals. Apply what you learn!"
-            },
-            "nostalgic": {
-                "duration": "Leisurely pace",
-                "environment": "Meaningful location",
-                "suggestion": "Reread old favorites. Reflect on memories triggered by the story."
-            },
-            "adventurous": {
-                "duration": "Immersive reading",
-                "environment": "New or unusual places",
-                "suggestion": "Try reading outdoors or in a new café. Let the story transport you!"
-            }
-        }
-        
-        return activities.get(mood, {
-            "duration": "Your preference",
-            "environment": "Wherever you feel comfortable",
-            "suggestion": "Read at your own pace and enjoy!"
-        })
+        return _MOOD_ACTIVITIES.get(mood, _DEFAULT_ACTIVITY)
@@ -1,6 +1,53 @@
+import numpy as np
 import pandas as pd
 
 
+def _title_rank(titles: pd.Series) -> np.ndarray:
+    """Alphabetical rank of each title (equal titles share one); missing titles rank last."""
+    codes, uniques = pd.factorize(titles, sort=True)
+    return np.where(codes < 0, len(uniques), codes)
+
+
+def _title_order(titles: pd.Series) -> np.ndarray:
+    """Positions that sort titles alphabetically; ties keep their order, missing titles last."""
+    return np.argsort(_title_rank(titles), kind="stable")
+
+
+def build_indices(books_df: pd.DataFrame, columns=("Bookshelf", "Author")) -> dict:
+    """Inverted indices {column: {label: ndarray of row positions}} for the given columns.
+
+    With an index, a genre/author lookup is a dict hit instead of a scan of
+    the whole catalog. Each label's positions are stored in Title order, so
+    callers never have to sort the matches. Missing labels are absent.
+
+    Building is a full pass over the catalog, so it only pays off when the
+    result lives as long as the frame: the app builds it once per loaded
+    catalog and passes it to every lookup.
+    """
+    if "Title" in books_df.columns:
+        title_rank = _title_rank(books_df["Title"])
+    else:
+        title_rank = np.zeros(len(books_df), dtype=np.intp)
+
+    indices = {}
+    for col in columns:
+        if col not in books_df.columns:
+            continue
+        codes, labels = pd.factorize(books_df[col])
+        # One stable sort puts rows in label order, each label's rows in Title
+        # order; missing labels (code -1) come first and are dropped
+        order = np.lexsort((title_rank, codes))
+        order = order[codes[order] >= 0]
+        if not len(order):
+            indices[col] = {}
+            continue
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.diff(sorted_codes)) + 1
+        keys = labels.take(sorted_codes[np.r_[0, starts]])
+        indices[col] = dict(zip(keys, np.split(order, starts)))
+    return indices
+
+
 class BookRecommender:
     """Very small, deterministic recommender used as a placeholder.
 
@@ -8,39 +55,60 @@ class BookRecommender:
     - recommend_by_genre(books_df, genre)
     - recommend_by_author(books_df, author)
     - recommend_by_book(books_df, title)
+
+    Each also takes optional `indices` from build_indices(books_df), built
+    once for a long-lived catalog frame.
     """
 
+    @staticmethod
+    def _matching_rows(books_df: pd.DataFrame, column: str, label, indices=None):
+        """Row positions whose column equals label, in Title order; None if there are none.
+
+        Uses the prebuilt indices when given, otherwise one vectorized mask.
+        """
+        if indices is not None:
+            return indices.get(column, {}).get(label)
+        if column not in books_df.columns:
+            return None
+        rows = np.flatnonzero((books_df[column] == label).to_numpy())
+        if not len(rows):
+            return None
+        if "Title" in books_df.columns:
+            rows = rows[_title_order(books_df["Title"].iloc[rows])]
+        return rows
+
     def _safe_head(self, df: pd.DataFrame, n: int = 5) -> pd.DataFrame:
         if df is None or df.empty:
             return pd.DataFrame(columns=["Title", "Author", "Bookshelf", "Link"])
         return df.head(n)
 
-    def recommend_by_genre(self, books_df: pd.DataFrame, genre: str) -> pd.DataFrame:
+    def recommend_by_genre(self, books_df: pd.DataFrame, genre: str, indices=None) -> pd.DataFrame:
         if books_df is None or books_df.empty:
             return self._safe_head(books_df)
-        filtered = books_df[books_df.get("Bookshelf") == genre]
-        if filtered.empty:
+        rows = self._matching_rows(books_df, "Bookshelf", genre, indices)
+        if rows is None:
             # fallback: top 5 by any means
-            return self._safe_head(books_df.sample(frac=1, random_state=1))
-        return self._safe_head(filtered.sort_values("Title"))
+            return books_df.sample(n=min(5, len(books_df)), random_state=1)
+        return self._safe_head(books_df.iloc[rows[:5]])
 
-    def recommend_by_author(self, books_df: pd.DataFrame, author: str) -> pd.DataFrame:
+    def recommend_by_author(self, books_df: pd.DataFrame, author: str, indices=None) -> pd.DataFrame:
         if books_df is None or books_df.empty:
             return self._safe_head(books_df)
-        filtered = books_df[books_df.get("Author") == author]
-        if filtered.empty:
-            return self._safe_head(books_df.sample(frac=1, random_state=2))
-        return self._safe_head(filtered.sort_values("Title"))
+        rows = self._matching_rows(books_df, "Author", author, indices)
+        if rows is None:
+            return books_df.sample(n=min(5, len(books_df)), random_state=2)
+        return self._safe_head(books_df.iloc[rows[:5]])
 
-    def recommend_by_book(self, books_df: pd.DataFrame, title: str) -> pd.DataFrame:
+    def recommend_by_book(self, books_df: pd.DataFrame, title: str, indices=None) -> pd.DataFrame:
         if books_df is None or books_df.empty:
             return self._safe_head(books_df)
         # Simple nearest-by-same-author fallback
         row = books_df[books_df.get("Title") == title]
         if row.empty:
-            return self._safe_head(books_df.sample(frac=1, random_state=3))
+            return books_df.sample(n=min(5, len(books_df)), random_state=3)
         author = row.iloc[0].get("Author")
         if author:
-            same_author = books_df[books_df.get("Author") == author]
+            rows = self._matching_rows(books_df, "Author", author, indices)
+            same_author = books_df.iloc[np.sort(rows) if rows is not None else []]
             return self._safe_head(same_author[same_author.get("Title") != title])
-        return self._safe_head(books_df.sample(frac=1, random_state=4))
+        return books_df.sample(n=min(5, len(books_df)), random_state=4)
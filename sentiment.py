@@ -3,14 +3,64 @@ Sentiment Analysis Module
 Analyzes sentiment of text using VADER and TextBlob
 """
 
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from textblob import TextBlob
+import functools
+
+
+# vaderSentiment and TextBlob (which pulls in NLTK) are imported on first use
+# so importing this module stays cheap for pages that never analyze text.
+@functools.lru_cache(maxsize=1)
+def _get_vader():
+    """Shared VADER analyzer (loading the lexicon is the expensive part)"""
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_textblob():
+    """TextBlob class, imported on first use"""
+    from textblob import TextBlob
+    return TextBlob
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_vader(text):
+    """
+    Run VADER on text, memoized per distinct string.
+    Returns an immutable (label, score, pos, neu, neg) tuple.
+    """
+    vader_scores = _get_vader().polarity_scores(text)
+    
+    # Determine overall sentiment
+    compound = vader_scores['compound']
+    if compound >= 0.05:
+        label = "Positive"
+    elif compound <= -0.05:
+        label = "Negative"
+    else:
+        label = "Neutral"
+    
+    return (label, abs(compound), vader_scores['pos'], vader_scores['neu'],
+            vader_scores['neg'])
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_analyze(text):
+    """
+    Run VADER and TextBlob on text, memoized per distinct string.
+    Returns an immutable (label, score, pos, neu, neg, textblob_polarity) tuple.
+    """
+    # VADER decides the label; TextBlob polarity is reported alongside it
+    vader = _cached_vader(text)
+    textblob_polarity = _get_textblob()(text).sentiment.polarity
+    return vader + (textblob_polarity,)
+
 
 class SentimentAnalyzer:
     """Sentiment analysis using multiple NLP methods"""
     
-    def __init__(self):
-        self.vader = SentimentIntensityAnalyzer()
+    @property
+    def vader(self):
+        return _get_vader()
     
     def analyze(self, text):
         """
@@ -18,52 +68,61 @@ class SentimentAnalyzer:
         Returns a dictionary with sentiment scores
         """
         try:
-            # VADER sentiment analysis
-            vader_scores = self.vader.polarity_scores(text)
-            
-            # TextBlob sentiment analysis
-            blob = TextBlob(text)
-            textblob_polarity = blob.sentiment.polarity
-            
-            # Determine overall sentiment
-            compound = vader_scores['compound']
-            if compound >= 0.05:
-                label = "Positive"
-            elif compound <= -0.05:
-                label = "Negative"
-            else:
-                label = "Neutral"
+            label, score, positive, neutral, negative, textblob_polarity = _cached_analyze(text)
             
             return {
                 'label': label,
-                'score': abs(compound),
-                'positive': vader_scores['pos'],
-                'neutral': vader_scores['neu'],
-                'negative': vader_scores['neg'],
+                'score': score,
+                'positive': positive,
+                'neutral': neutral,
+                'negative': negative,
                 'textblob_polarity': textblob_polarity
             }
             
         except Exception as e:
+            return self._error_result(e)
+    
+    def _vader_only(self, text):
+        """
+        Same as analyze() without the TextBlob pass, for callers that only
+        need the label and VADER scores (no 'textblob_polarity' key)
+        """
+        try:
+            label, score, positive, neutral, negative = _cached_vader(text)
+            
             return {
-                'label': 'Error',
-                'score': 0.0,
-                'positive': 0.0,
-                'neutral': 1.0,
-                'negative': 0.0,
-                'error': str(e)
+                'label': label,
+                'score': score,
+                'positive': positive,
+                'neutral': neutral,
+                'negative': negative
             }
+            
+        except Exception as e:
+            return self._error_result(e)
+    
+    @staticmethod
+    def _error_result(e):
+        return {
+            'label': 'Error',
+            'score': 0.0,
+            'positive': 0.0,
+            'neutral': 1.0,
+            'negative': 0.0,
+            'error': str(e)
+        }
     
     def analyze_review(self, review_text):
         """
         Specialized method for analyzing book reviews
         """
-        return self.analyze(review_text)
+        return self._vader_only(review_text)
     
     def get_emotion(self, text):
         """
         Get the dominant emotion from text
         """
-        result = self.analyze(text)
+        result = self._vader_only(text)
         
         if result['label'] == 'Positive':
             if result['score'] > 0.7:
@@ -3,9 +3,76 @@ AI Story Generator Module
 Generates unique books and stories based on user prompts and trending patterns
 """
 import os
-from openai import OpenAI
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import json
+from types import MappingProxyType
+
+
+# Canned content used when no OpenAI API key is configured
+_FALLBACK_STORY = """# A {genre} Tale
+
+{prompt}
+
+Once upon a time, in a world not unlike our own, an adventure began. The protagonist, 
+driven by curiosity and determination, embarked on a journey that would change everything.
+
+Through trials and tribulations, facing challenges both external and internal, our hero 
+discovered truths about themselves and the world around them. 
+
+Along the way, unexpected allies appeared, offering wisdom and assistance. Together, they 
+navigated through obstacles, each step bringing them closer to their goal.
+
+The climax arrived suddenly, testing everything they had learned. With courage and 
+ingenuity, they overcame the final challenge.
+
+In the end, they emerged transformed, carrying with them the lessons of their journey. 
+The world was a little brighter, and hope prevailed.
+
+The End.
+
+---
+Note: This is a sample story. Configure OpenAI API for full AI-generated content."""
+
+_FALLBACK_CONTINUATION = """
+
+As the story continued, new developments emerged. {prompt} The characters found 
+themselves facing unexpected situations, each moment bringing fresh challenges and 
+revelations. The journey was far from over, and adventure still awaited.
+
+---
+Note: Configure OpenAI API for full AI-generated continuations."""
+
+_FALLBACK_IDEAS = MappingProxyType({
+    "Fantasy": (
+        "A young mage discovers they can speak to ancient spirits",
+        "A cursed kingdom where time flows backward",
+        "Two rival wizards must team up to save their world",
+        "A dragon who has forgotten how to fly seeks help",
+        "An enchanted library where books come alive at night"
+    ),
+    "Sci-Fi": (
+        "First contact with an alien civilization living in dark matter",
+        "A time traveler stuck in a temporal loop",
+        "Humans discover they're living in a simulation",
+        "An AI becomes conscious and questions its purpose",
+        "Colony ship arrives at destination after 1000 years"
+    ),
+    "Mystery": (
+        "A detective who can see the last moments of the deceased",
+        "Missing artifacts from museums around the world",
+        "A small town where everyone has the same recurring dream",
+        "An amateur sleuth solves cold cases using old letters",
+        "A locked room mystery in a high-tech smart home"
+    ),
+    "Romance": (
+        "Two rival chefs compete for the same restaurant space",
+        "A chance encounter at an airport leads to adventure",
+        "Pen pals discover they live in the same city",
+        "A time capsule reveals a decades-old love story",
+        "Two people keep meeting at different life stages"
+    )
+})
+
 
 class StoryGenerator:
     """Generate AI-powered stories and books"""
@@ -13,10 +80,110 @@ class StoryGenerator:
     def __init__(self):
         """Initialize the story generator with OpenAI API"""
         api_key = os.getenv('OPENAI_API_KEY')
-        self.client = OpenAI(api_key=api_key) if api_key else None
+        self._api_key = api_key
+        self._async_client = None
+        self.client = None
+        if api_key:
+            # openai (httpx, pydantic) is only worth importing when it will be used
+            from openai import OpenAI
+            self.client = OpenAI(api_key=api_key)
+    
+    @property
+    def async_client(self):
+        """AsyncOpenAI client for the *_async methods, created on first use"""
+        if self._async_client is None and self._api_key:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(api_key=self._api_key)
+        return self._async_client
+    
+    def _complete(self, messages: List[Dict], max_tokens: int, temperature: float,
+                  on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Run a chat completion and return its text
+        
+        With on_chunk, the response is streamed and each piece of text is passed
+        to on_chunk as soon as it arrives, so callers can render progressively.
+        """
+        if on_chunk is None:
+            response = self.client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            return response.choices[0].message.content
+        
+        stream = self.client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        parts = []
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                on_chunk(delta)
+        return ''.join(parts)
+    
+    @staticmethod
+    def _story_messages(prompt: str, genre: str, length: str, style: str) -> List[Dict]:
+        """Chat messages asking for a story, shared by the sync and async paths"""
+        # Define length parameters
+        length_map = {
+            "short": "500-800 words",
+            "medium": "1500-2500 words",
+            "long": "3000-5000 words"
+        }
+        
+        word_count = length_map.get(length, "500-800 words")
+        
+        # Create system message
+        system_message = f"""You are a creative story writer specializing in {genre} fiction. 
+        Write in a {style} style. Create engaging, well-structured stories with vivid descriptions 
+        and compelling characters."""
+        
+        # Create user message
+        user_message = f"""Write a {length} {genre} story ({word_count}) based on this prompt:
+        
+        {prompt}
+        
+        Include:
+        1. A captivating title
+        2. Well-developed characters
+        3. An engaging plot
+        4. Descriptive scenes
+        5. A satisfying conclusion
+        
+        Format the story with clear paragraphs and structure."""
+        
+        return [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ]
+    
+    @staticmethod
+    def _story_result(story_content: str, prompt: str, genre: str, style: str) -> Dict:
+        """Split a generated story into title and body"""
+        # Extract title (assuming first line is the title)
+        title, _, content = story_content.strip().partition('\n')
+        title = title.strip('#').strip()
+        content = content.strip()
+        
+        return {
+            "title": title,
+            "content": content,
+            "genre": genre,
+            "word_count": len(content.split()),
+            "style": style,
+            "prompt": prompt
+        }
     
     def generate_story(self, prompt: str, genre: str = "General", 
-                      length: str = "short", style: str = "narrative") -> Dict:
+                      length: str = "short", style: str = "narrative",
+                      on_chunk: Optional[Callable[[str], None]] = None) -> Dict:
         """
         Generate a story based on user prompt
         
@@ -25,6 +192,7 @@ class StoryGenerator:
             genre: Story genre (fantasy, sci-fi, romance, mystery, etc.)
             length: Story length (short, medium, long)
             style: Writing style (narrative, descriptive, dialogue-heavy)
+            on_chunk: Optional callback receiving the raw text as it streams in
         
         Returns:
             Dictionary with story content and metadata
@@ -39,59 +207,14 @@ class StoryGenerator:
             }
         
         try:
-            # Define length parameters
-            length_map = {
-                "short": "500-800 words",
-                "medium": "1500-2500 words",
-                "long": "3000-5000 words"
-            }
-            
-            word_count = length_map.get(length, "500-800 words")
-            
-            # Create system message
-            system_message = f"""You are a creative story writer specializing in {genre} fiction. 
-            Write in a {style} style. Create engaging, well-structured stories with vivid descriptions 
-            and compelling characters."""
-            
-            # Create user message
-            user_message = f"""Write a {length} {genre} story ({word_count}) based on this prompt:
-            
-            {prompt}
-            
-            Include:
-            1. A captivating title
-            2. Well-developed characters
-            3. An engaging plot
-            4. Descriptive scenes
-            5. A satisfying conclusion
-            
-            Format the story with clear paragraphs and structure."""
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_message}
-                ],
+            story_content = self._complete(
+                self._story_messages(prompt, genre, length, style),
                 max_tokens=4000,
-                temperature=0.8
+                temperature=0.8,
+                on_chunk=on_chunk
             )
             
-            story_content = response.choices[0].message.content
-            
-            # Extract title (assuming first line is the title)
-            lines = story_content.strip().split('\n')
-            title = lines[0].strip('#').strip() if lines else "Untitled Story"
-            content = '\n'.join(lines[1:]).strip()
-            
-            return {
-                "title": title,
-                "content": content,
-                "genre": genre,
-                "word_count": len(content.split()),
-                "style": style,
-                "prompt": prompt
-            }
+            return self._story_result(story_content, prompt, genre, style)
             
         except Exception as e:
             print(f"Error generating story: {e}")
@@ -103,13 +226,15 @@ class StoryGenerator:
                 "error": str(e)
             }
     
-    def continue_story(self, existing_story: str, continuation_prompt: str) -> str:
+    def continue_story(self, existing_story: str, continuation_prompt: str,
+                       on_chunk: Optional[Callable[[str], None]] = None) -> str:
         """
         Continue an existing story based on a prompt
         
         Args:
             existing_story: The story so far
             continuation_prompt: Direction for continuation
+            on_chunk: Optional callback receiving the text as it streams in
         
         Returns:
             Additional story content
@@ -129,22 +254,32 @@ Continue the story with this direction: {continuation_prompt}
 
 Write 300-500 words that flow naturally from the existing content."""
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            return self._complete(
+                [
                     {"role": "system", "content": system_message},
                     {"role": "user", "content": user_message}
                 ],
                 max_tokens=1000,
-                temperature=0.8
+                temperature=0.8,
+                on_chunk=on_chunk
             )
             
-            return response.choices[0].message.content
-            
         except Exception as e:
             print(f"Error continuing story: {e}")
             return self._generate_fallback_continuation(continuation_prompt)
     
+    @staticmethod
+    def _idea_messages(genre: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": "You are a creative writing assistant."},
+            {"role": "user", "content": f"Write one unique and engaging {genre} story idea in a single sentence that inspires creativity. Reply with the idea only."}
+        ]
+    
+    @staticmethod
+    def _idea_results(response) -> List[str]:
+        ideas = [choice.message.content.strip() for choice in response.choices]
+        return [idea for idea in ideas if idea]
+    
     def generate_story_ideas(self, genre: str, count: int = 5) -> List[str]:
         """
         Generate story ideas/prompts based on genre
@@ -160,18 +295,64 @@ Write 300-500 words that flow naturally from the existing content."""
             return self._generate_fallback_ideas(genre, count)
         
         try:
+            # One idea per choice: no list numbering to parse, and the
+            # high temperature keeps the choices distinct
             response = self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a creative writing assistant."},
-                    {"role": "user", "content": f"Generate {count} unique and engaging {genre} story ideas. Each idea should be one sentence and inspire creativity."}
-                ],
-                max_tokens=500,
+                messages=self._idea_messages(genre),
+                n=count,
+                max_tokens=80,
                 temperature=0.9
             )
             
-            ideas = response.choices[0].message.content.strip().split('\n')
-            return [idea.strip('0123456789.- ') for idea in ideas if idea.strip()]
+            return self._idea_results(response)
+            
+        except Exception as e:
+            print(f"Error generating ideas: {e}")
+            return self._generate_fallback_ideas(genre, count)
+    
+    async def generate_story_async(self, prompt: str, genre: str = "General",
+                                   length: str = "short", style: str = "narrative") -> Dict:
+        """
+        Async variant of generate_story, for running several requests concurrently
+        (e.g. asyncio.gather of a story and a batch of ideas)
+        """
+        if not self.async_client:
+            return self.generate_story(prompt, genre, length, style)
+        
+        try:
+            response = await self.async_client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=self._story_messages(prompt, genre, length, style),
+                max_tokens=4000,
+                temperature=0.8
+            )
+            return self._story_result(response.choices[0].message.content, prompt, genre, style)
+            
+        except Exception as e:
+            print(f"Error generating story: {e}")
+            return {
+                "title": "Sample Story",
+                "content": self._generate_fallback_story(prompt, genre),
+                "genre": genre,
+                "word_count": 500,
+                "error": str(e)
+            }
+    
+    async def generate_story_ideas_async(self, genre: str, count: int = 5) -> List[str]:
+        """Async variant of generate_story_ideas"""
+        if not self.async_client:
+            return self._generate_fallback_ideas(genre, count)
+        
+        try:
+            response = await self.async_client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=self._idea_messages(genre),
+                n=count,
+                max_tokens=80,
+                temperature=0.9
+            )
+            return self._idea_results(response)
             
         except Exception as e:
             print(f"Error generating ideas: {e}")
@@ -179,72 +360,12 @@ Write 300-500 words that flow naturally from the existing content."""
     
     def _generate_fallback_story(self, prompt: str, genre: str) -> str:
         """Generate a basic story when AI is unavailable"""
-        return f"""# A {genre} Tale
-
-{prompt}
-
-Once upon a time, in a world not unlike our own, an adventure began. The protagonist, 
-driven by curiosity and determination, embarked on a journey that would change everything.
-
-Through trials and tribulations, facing challenges both external and internal, our hero 
-discovered truths about themselves and the world around them. 
-
-Along the way, unexpected allies appeared, offering wisdom and assistance. Together, they 
-navigated through obstacles, each step bringing them closer to their goal.
-
-The climax arrived suddenly, testing everything they had learned. With courage and 
-ingenuity, they overcame the final challenge.
-
-In the end, they emerged transformed, carrying with them the lessons of their journey. 
-The world was a little brighter, and hope prevailed.
-
-The End.
-
----
-Note: This is a sample story. Configure OpenAI API for full AI-generated content."""
+        return _FALLBACK_STORY.format(genre=genre, prompt=prompt)
     
     def _generate_fallback_continuation(self, prompt: str) -> str:
         """Generate basic continuation when AI is unavailable"""
-        return f"""
-
-As the story continued, new developments emerged. {prompt} The characters found 
-themselves facing unexpected situations, each moment bringing fresh challenges and 
-revelations. The journey was far from over, and adventure still awaited.
-
----
-Note: Configure OpenAI API for full AI-generated continuations."""
+        return _FALLBACK_CONTINUATION.format(prompt=prompt)
     
     def _generate_fallback_ideas(self, genre: str, count: int) -> List[str]:
         """Generate basic ideas when AI is unavailable"""
-        ideas_map = {
-            "Fantasy": [
-                "A young mage discovers they can speak to ancient spirits",
-                "A cursed kingdom where time flows backward",
-                "Two rival wizards must team up to save their world",
-                "A dragon who has forgotten how to fly seeks help",
-                "An enchanted library where books come alive at night"
-            ],
-            "Sci-Fi": [
-                "First contact with an alien civilization living in dark matter",
-                "A time traveler stuck in a temporal loop",
-                "Humans discover they're living in a simulation",
-                "An AI becomes conscious and questions its purpose",
-                "Colony ship arrives at destination after 1000 years"
-            ],
-            "Mystery": [
-                "A detective who can see the last moments of the deceased",
-                "Missing artifacts from museums around the world",
-                "A small town where everyone has the same recurring dream",
-                "An amateur sleuth solves cold cases using old letters",
-                "A locked room mystery in a high-tech smart home"
-            ],
-            "Romance": [
-                "Two rival chefs compete for the same restaurant space",
-                "A chance encounter at an airport leads to adventure",
-                "Pen pals discover they live in the same city",
-                "A time capsule reveals a decades-old love story",
-                "Two people keep meeting at different life stages"
-            ]
-        }
-        
-        return ideas_map.get(genre, ideas_map["Fantasy"])[:count]
+        return list(_FALLBACK_IDEAS.get(genre, _FALLBACK_IDEAS["Fantasy"])[:count])
@@ -3,7 +3,61 @@ Book Summarizer Module
 Generates summaries, extracts themes, and analyzes sentiment of book text
 """
 
-from textblob import TextBlob
+import functools
+import re
+from collections import Counter
+
+# Sentence boundary: whitespace following terminal punctuation
+_SENT_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+# Words for theme extraction, and the function words that never make a theme
+_WORD_RE = re.compile(r"[a-z][a-z'-]+")
+_STOPWORDS = frozenset("""
+    a about above after again against all also am an and any are as at be because been
+    before being below between both but by can could did do does doing down during each
+    even ever every few first for from further had has have having he her here hers herself him
+    himself his how i if in into is it its itself just like made make many may me might
+    more most much must my myself never no nor not now of off on once one only or other
+    our ours ourselves out over own said same say says she should so some still such than
+    that the their theirs them themselves then there these they this those through thus
+    to too under until up upon us very was we were what when where which while who whom
+    whose why will with within without would yet you your yours yourself yourselves
+""".split())
+
+
+@functools.lru_cache(maxsize=1)
+def _get_textblob():
+    """TextBlob class, imported on first use (it pulls in NLTK)"""
+    from textblob import TextBlob
+    return TextBlob
+
+
+# The same description or review text is often analyzed several times per
+# session, so the (pure) analysis work is memoized per distinct string.
+@functools.lru_cache(maxsize=1024)
+def _cached_themes(text, limit=5):
+    """Most frequent content-word bigrams, topped up with frequent single words"""
+    tokens = _WORD_RE.findall(text.lower())
+    content = [t not in _STOPWORDS for t in tokens]
+    
+    # Only pairs that are adjacent in the text and contain no stopword
+    bigrams = Counter(
+        (a, b) for (a, b), keep_a, keep_b in zip(zip(tokens, tokens[1:]), content, content[1:])
+        if keep_a and keep_b
+    )
+    themes = [' '.join(pair) for pair, n in bigrams.most_common(limit) if n > 1]
+    
+    if len(themes) < limit:
+        covered = {word for theme in themes for word in theme.split()}
+        words = Counter(t for t, keep in zip(tokens, content) if keep and t not in covered)
+        themes += [word for word, _ in words.most_common(limit - len(themes))]
+    return tuple(themes)
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_polarity(text):
+    return _get_textblob()(text).sentiment.polarity
+
 
 class BookSummarizer:
     """Text summarization and analysis using NLP"""
@@ -22,14 +76,14 @@ class BookSummarizer:
                 return "Text too short to summarize."
             
             # Simple extractive summary - take first few sentences
-            blob = TextBlob(text)
-            sentences = blob.sentences
+            # Only the first three sentences are needed, so stop splitting there
+            sentences = _SENT_SPLIT.split(text, maxsplit=3)
             
             if len(sentences) <= 3:
                 return text
             
             # Take first 3 sentences as summary
-            summary = '. '.join([str(s) for s in sentences[:3]]) + '.'
+            summary = '. '.join(sentences[:3]) + '.'
             return summary
             
         except Exception as e:
@@ -41,10 +95,8 @@ class BookSummarizer:
         Uses simple keyword extraction
         """
         try:
-            blob = TextBlob(text)
-            
-            # Get noun phrases as potential themes
-            themes = list(set(blob.noun_phrases))[:5]
+            # Get recurring phrases and words as potential themes
+            themes = list(_cached_themes(text))
             
             if not themes:
                 return ["Literature", "Reading", "Books"]
@@ -60,8 +112,7 @@ class BookSummarizer:
         Returns: Positive, Neutral, or Negative
         """
         try:
-            blob = TextBlob(text)
-            polarity = blob.sentiment.polarity
+            polarity = _cached_polarity(text)
             
             if polarity > 0.1:
                 return "Positive"
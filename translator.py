@@ -3,27 +3,211 @@ Book Translator Module
 Translates book text between multiple languages
 """
 
-from deep_translator import GoogleTranslator
+import functools
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from types import MappingProxyType, SimpleNamespace
+
+# Language code -> display name; read-only, shared by every BookTranslator
+_SUPPORTED_LANGUAGES = MappingProxyType({
+    'en': 'English',
+    'es': 'Spanish',
+    'fr': 'French',
+    'de': 'German',
+    'it': 'Italian',
+    'pt': 'Portuguese',
+    'ru': 'Russian',
+    'ja': 'Japanese',
+    'ko': 'Korean',
+    'zh-cn': 'Chinese (Simplified)',
+    'hi': 'Hindi',
+    'kn': 'Kannada',
+    'ar': 'Arabic'
+})
+
+# Translation memory: recent results in process, everything on disk
+CACHE_PATH = Path.home() / '.cache' / 'book_translator.db'
+_MEMORY_SIZE = 2048
+_memory = OrderedDict()
+_store = None
+_store_lock = threading.Lock()
+
+class _PooledRequests:
+    """The requests module as seen by deep_translator.google, with get() on a shared session"""
+    
+    def __init__(self, module, session):
+        self._module = module
+        self.get = session.get
+    
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+
+# deep_translator (requests, BeautifulSoup, ...) is imported on first use, so
+# pages that only list the supported languages never pay for it.
+@functools.lru_cache(maxsize=1)
+def _get_backend():
+    """GoogleTranslator and the errors worth retrying, wired to a pooled session"""
+    import deep_translator.google
+    import requests
+    from deep_translator.exceptions import RequestError, TooManyRequests
+    from requests.adapters import HTTPAdapter
+    
+    # deep_translator sends every request with a bare requests.get, which opens
+    # (and TLS-handshakes) a new connection each time. Its module is pointed at
+    # a shared session instead, so connections are kept alive and pooled.
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=8))
+    deep_translator.google.requests = _PooledRequests(requests, session)
+    
+    return SimpleNamespace(
+        GoogleTranslator=deep_translator.google.GoogleTranslator,
+        TooManyRequests=TooManyRequests,
+        network_errors=(RequestError, requests.RequestException),
+    )
+
+
+# Sentence boundary: the whitespace after terminal punctuation
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def _cache_key(text, source_lang, target_lang):
+    return hashlib.sha1(f"{source_lang}|{target_lang}|{text}".encode('utf-8')).hexdigest()
+
+
+def _get_store():
+    """Open (once) the on-disk cache; None if it cannot be created"""
+    global _store
+    if _store is None:
+        try:
+            CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(CACHE_PATH), check_same_thread=False)
+            conn.execute('''CREATE TABLE IF NOT EXISTS translations
+                            (key TEXT PRIMARY KEY, translated TEXT)''')
+            conn.commit()
+            _store = conn
+        except (OSError, sqlite3.Error):
+            _store = False
+    return _store or None
+
+
+def _lookup_translation(text, source_lang, target_lang):
+    """Previously stored translation of text, or None"""
+    key = _cache_key(text, source_lang, target_lang)
+    with _store_lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return _memory[key]
+        store = _get_store()
+        if store is None:
+            return None
+        try:
+            row = store.execute('SELECT translated FROM translations WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is not None:
+            _remember(key, row[0])
+            return row[0]
+    return None
+
+
+def _store_translation(text, source_lang, target_lang, translated):
+    """Remember a successful translation in memory and on disk"""
+    if not isinstance(translated, str):
+        return
+    key = _cache_key(text, source_lang, target_lang)
+    with _store_lock:
+        _remember(key, translated)
+        store = _get_store()
+        if store is not None:
+            try:
+                store.execute('INSERT OR REPLACE INTO translations VALUES (?, ?)', (key, translated))
+                store.commit()
+            except sqlite3.Error:
+                pass
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_detection(excerpt):
+    """Language code of excerpt, memoized; failures raise, so they are not cached"""
+    from deep_translator import single_detection
+    return single_detection(excerpt, api_key=None)
+
+
+def _iter_sentence_spans(text):
+    """Yield (start, end) offsets of the pieces re.split(_SENT_RE, text) would return"""
+    start = 0
+    for match in _SENT_RE.finditer(text):
+        yield start, match.start()
+        start = match.end()
+    yield start, len(text)
+
+
+def _remember(key, translated):
+    _memory[key] = translated
+    _memory.move_to_end(key)
+    if len(_memory) > _MEMORY_SIZE:
+        _memory.popitem(last=False)
+
+
+class _RateLimiter:
+    """Token bucket pacing requests to the translation service, shared by all
+    workers of one BookTranslator.
+
+    Requests go through at up to max_rps per second. Every HTTP 429 halves the
+    allowed rate (down to min_rps); every success adds back a small step, so
+    the rate climbs again to max_rps once the service stops throttling.
+    """
+    
+    def __init__(self, max_rps, min_rps=0.2, step=0.1):
+        self.max_rps = max_rps
+        self.min_rps = min(min_rps, max_rps)
+        self.step = step
+        self.rps = max_rps
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            capacity = max(1.0, self.rps)
+            self._tokens = min(capacity, self._tokens + (now - self._updated) * self.rps)
+            self._updated = now
+            # Reserve the token even if it is not there yet; the debt is what
+            # this caller waits out, so concurrent callers queue up in order
+            self._tokens -= 1.0
+            wait = -self._tokens / self.rps if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+    
+    def throttled(self):
+        with self._lock:
+            self.rps = max(self.min_rps, self.rps / 2)
+    
+    def succeeded(self):
+        with self._lock:
+            self.rps = min(self.max_rps, self.rps + self.step)
+
 
 class BookTranslator:
     """Language translation using Google Translate API"""
     
-    def __init__(self):
-        self.supported_languages = {
-            'en': 'English',
-            'es': 'Spanish',
-            'fr': 'French',
-            'de': 'German',
-            'it': 'Italian',
-            'pt': 'Portuguese',
-            'ru': 'Russian',
-            'ja': 'Japanese',
-            'ko': 'Korean',
-            'zh-cn': 'Chinese (Simplified)',
-            'hi': 'Hindi',
-            'kn': 'Kannada',
-            'ar': 'Arabic'
-        }
+    def __init__(self, max_concurrency=4, max_rps=5.0):
+        # Chunks of a long text translated at the same time
+        self.max_concurrency = max_concurrency
+        # Upper bound on requests per second; lowered automatically on HTTP 429
+        self.max_rps = max_rps
+        self._rate_limiter = _RateLimiter(max_rps)
+        self._local = threading.local()
+        self.supported_languages = _SUPPORTED_LANGUAGES
     
     def translate(self, text, source_lang='auto', target_lang='en', chunk_size=4500):
         """
@@ -45,8 +229,14 @@ class BookTranslator:
             
             # If text is short, translate directly
             if len(text) <= chunk_size:
-                translator = GoogleTranslator(source=source_lang, target=target_lang)
-                return translator.translate(text)
+                cached = _lookup_translation(text, source_lang, target_lang)
+                if cached is not None:
+                    return cached
+                translator = self._get_translator(source_lang, target_lang)
+                self._rate_limiter.acquire()
+                translated = translator.translate(text)
+                _store_translation(text, source_lang, target_lang, translated)
+                return translated
             
             # For long texts, split and translate in chunks
             return self.translate_long_text(text, source_lang, target_lang, chunk_size)
@@ -63,9 +253,8 @@ class BookTranslator:
         Detect the language of the given text
         """
         try:
-            from deep_translator import single_detection
-            detected = single_detection(text, api_key=None)
-            return detected
+            # The opening of a text decides its language, and keeps the cache key small
+            return _cached_detection(text[:512])
         except:
             return "unknown"
     
@@ -84,61 +273,109 @@ class BookTranslator:
             Translated text
         """
         try:
-            # Split text into sentences to avoid breaking mid-sentence
-            import re
-            import time
-            sentences = re.split(r'(?<=[.!?])\s+', text)
-            
             chunks = []
-            current_chunk = ""
+            # Offsets of the chunk being built; text is only sliced when a chunk is done
+            chunk_start = chunk_end = 0
             
-            for sentence in sentences:
+            # Walk the sentence boundaries to avoid breaking mid-sentence
+            for start, end in _iter_sentence_spans(text):
                 # If adding this sentence exceeds chunk size, save current chunk
-                if len(current_chunk) + len(sentence) > chunk_size and current_chunk:
-                    chunks.append(current_chunk)
-                    current_chunk = sentence
-                else:
-                    current_chunk += (" " if current_chunk else "") + sentence
+                if end - chunk_start > chunk_size and chunk_end > chunk_start:
+                    chunks.append(text[chunk_start:chunk_end])
+                    chunk_start = start
+                elif chunk_end == chunk_start:
+                    chunk_start = start
+                chunk_end = end
             
             # Add the last chunk
-            if current_chunk:
-                chunks.append(current_chunk)
-            
-            # Translate each chunk with retry logic
-            translated_chunks = []
+            if chunk_end > chunk_start:
+                chunks.append(text[chunk_start:chunk_end])
             
+            # Cached chunks are filled in right away; the rest are translated
+            # concurrently, each request being pure network wait
+            translated_chunks = [None] * len(chunks)
+            # chunk text -> positions it occupies; repeated chunks (headings,
+            # boilerplate) are translated once and copied to every position
+            pending = {}
             for i, chunk in enumerate(chunks):
-                if progress_callback:
-                    progress_callback(i + 1, len(chunks))
-                
-                # Retry logic for network errors
-                max_retries = 3
-                retry_delay = 2
-                
-                for attempt in range(max_retries):
-                    try:
-                        # Create new translator instance for each chunk to avoid connection issues
-                        translator = GoogleTranslator(source=source_lang, target=target_lang)
-                        translated = translator.translate(chunk)
-                        translated_chunks.append(translated)
-                        break  # Success, exit retry loop
-                        
-                    except Exception as e:
-                        if attempt < max_retries - 1:
-                            # Wait before retrying
-                            time.sleep(retry_delay * (attempt + 1))
-                        else:
-                            # Last attempt failed, append error message
-                            translated_chunks.append(f"[Translation failed for chunk {i+1}: {str(e)}]")
-                
-                # Delay between chunks to avoid rate limiting
-                time.sleep(1)
+                cached = _lookup_translation(chunk, source_lang, target_lang)
+                if cached is not None:
+                    translated_chunks[i] = cached
+                else:
+                    pending.setdefault(chunk, []).append(i)
+            
+            done = len(chunks) - sum(map(len, pending.values()))
+            if progress_callback and done:
+                progress_callback(done, len(chunks))
+            
+            with ThreadPoolExecutor(max_workers=max(1, self.max_concurrency)) as pool:
+                futures = {
+                    pool.submit(self._translate_chunk, chunk, positions[0], source_lang, target_lang): positions
+                    for chunk, positions in pending.items()
+                }
+                # Progress is reported from this thread, as chunks complete
+                for future in as_completed(futures):
+                    translated = future.result()
+                    positions = futures[future]
+                    for i in positions:
+                        translated_chunks[i] = translated
+                    done += len(positions)
+                    if progress_callback:
+                        progress_callback(done, len(chunks))
             
             return " ".join(translated_chunks)
             
         except Exception as e:
             return f"Translation error: {str(e)}"
     
+    def _get_translator(self, source_lang, target_lang):
+        """GoogleTranslator for this thread, reused while the language pair is the same"""
+        # GoogleTranslator keeps per-request state, so each thread has its own
+        translator = getattr(self._local, 'translator', None)
+        if translator is None or self._local.langs != (source_lang, target_lang):
+            translator = _get_backend().GoogleTranslator(source=source_lang, target=target_lang)
+            self._local.translator = translator
+            self._local.langs = (source_lang, target_lang)
+        return translator
+    
+    def _translate_chunk(self, chunk, index, source_lang, target_lang):
+        """Translate one chunk with retries; returns an error marker if all attempts fail"""
+        translator = self._get_translator(source_lang, target_lang)
+        backend = _get_backend()
+        
+        # Only rate limiting and network failures are worth retrying; anything
+        # else (bad language, no translation found) fails the same way again
+        max_retries = 3
+        retry_delay = 1
+        
+        for attempt in range(max_retries):
+            self._rate_limiter.acquire()
+            try:
+                translated = translator.translate(chunk)
+                _store_translation(chunk, source_lang, target_lang, translated)
+                self._rate_limiter.succeeded()
+                return translated
+                
+            except backend.TooManyRequests as e:
+                # Slow down every worker, not just this one
+                self._rate_limiter.throttled()
+                error = e
+                
+            except backend.network_errors as e:
+                error = e
+                
+            except Exception as e:
+                error = e
+                break
+            
+            if attempt < max_retries - 1:
+                # Exponential backoff before retrying
+                time.sleep(retry_delay * 2 ** attempt)
+        
+        # Last attempt failed: start this thread over with a fresh translator
+        self._local.translator = None
+        return f"[Translation failed for chunk {index+1}: {str(error)}]"
+    
     def translate_book_excerpt(self, excerpt, target_lang='en'):
         """
         Translate a book excerpt to the target language
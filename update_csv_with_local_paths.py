@@ -2,66 +2,155 @@
 Update the CSV file to include local HTML file paths.
 This allows the app to use downloaded files instead of fetching from network.
 """
+import json
+import os
 import pandas as pd
 from pathlib import Path
-import re
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is skipped without pyarrow
+    pa = pq = None
 
 # Configuration
 CSV_PATH = Path('.dist/gutenberg_html_dataset (1).csv')
 OUTPUT_CSV = Path('.dist/gutenberg_html_dataset_local.csv')
+OUTPUT_PARQUET = OUTPUT_CSV.with_suffix('.parquet')
 HTML_DIR = Path('data/books_html')
+INDEX_CACHE = Path('.cache/html_index.json')
+BOOK_ID_PATTERN = r'/epub/(\d+)/'
+CHUNK_SIZE = 100_000  # CSV rows processed per pass
+
+# Every column is written back, so all are read; the heavily repeated ones as
+# categories, and the link as a string column for the vectorized regex
+CSV_DTYPES = {
+    'HTML_Link': str,
+    'Author': 'category',
+    'Bookshelf': 'category',
+}
+
+def index_local_files(html_dir: Path) -> tuple:
+    """Map book ID -> absolute path of its local HTML file, in one directory scan.
 
-def extract_book_id(url: str) -> str:
-    """Extract book ID from Gutenberg URL."""
-    match = re.search(r'/epub/(\d+)/', url)
-    return match.group(1) if match else None
+    Files are named "<book_id>_<slug>.html"; the first file seen for an ID wins.
+    Returns (index, number of .html files scanned).
+    """
+    # Resolve the directory once; each file's path is then plain string joining
+    root = str(Path(html_dir).resolve())
+    index = {}
+    n_files = 0
+    with os.scandir(html_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not name.endswith('.html') or name.startswith('.'):
+                continue
+            n_files += 1
+            book_id, sep, _ = name.partition('_')
+            if sep:
+                index.setdefault(book_id, os.path.join(root, name))
+    return index, n_files
 
-def find_local_file(book_id: str, html_dir: Path) -> str:
-    """Find local HTML file for a book ID."""
-    if not book_id:
-        return ''
+def load_local_index(html_dir: Path, cache_path: Path = INDEX_CACHE) -> tuple:
+    """index_local_files(html_dir), reusing the copy saved in cache_path while
+    the directory is unchanged (its mtime moves whenever a file is added,
+    removed or renamed)."""
+    root = str(Path(html_dir).resolve())
+    mtime_ns = os.stat(root).st_mtime_ns
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['html_dir'] == root and cached['mtime_ns'] == mtime_ns:
+            return cached['index'], cached['n_files']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
     
-    # Look for files starting with book_id
-    matches = list(html_dir.glob(f"{book_id}_*.html"))
-    if matches:
-        return str(matches[0].absolute())
-    return ''
+    index, n_files = index_local_files(html_dir)
+    try:
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'html_dir': root, 'mtime_ns': mtime_ns,
+                       'n_files': n_files, 'index': index}, f)
+    except OSError:
+        pass  # Only the next run's shortcut is lost
+    return index, n_files
+
+def _parquet_schema(schema):
+    """schema with every dictionary (categorical) column stored as its plain values.
+
+    Each CSV chunk has its own categories, so pandas picks the code width per
+    chunk and a later chunk cannot be cast to the first one's dictionary type.
+    Plain strings also give load_books() the same dtypes as reading the CSV;
+    Parquet still dictionary-encodes repeated values on disk.
+    """
+    return pa.schema(
+        [field.with_type(field.type.value_type)
+         if pa.types.is_dictionary(field.type) else field
+         for field in schema],
+        metadata=None,
+    )
 
 def main():
     print("=" * 70)
     print("UPDATE CSV WITH LOCAL FILE PATHS")
     print("=" * 70)
     
-    # Load CSV
-    print(f"\n📚 Loading: {CSV_PATH}")
-    df = pd.read_csv(CSV_PATH)
-    print(f"   Total books: {len(df)}")
-    
-    # Extract book IDs
-    print("\n🔍 Extracting book IDs...")
-    df['Book_ID'] = df['HTML_Link'].apply(extract_book_id)
-    
-    # Find local files
-    print(f"🔍 Searching for local HTML files in: {HTML_DIR}")
+    # Index local files first, so the CSV can be streamed through in one pass
+    print(f"\n🔍 Searching for local HTML files in: {HTML_DIR}")
     if not HTML_DIR.exists():
         print(f"   ⚠️  Directory not found. Run bulk_download_books.py first!")
         return
     
-    local_files = list(HTML_DIR.glob("*.html"))
-    print(f"   Found {len(local_files)} local HTML files")
+    local_index, n_files = load_local_index(HTML_DIR)
+    print(f"   Found {n_files} local HTML files")
     
-    # Add local path column
-    print("\n📝 Adding local file paths to CSV...")
-    df['Local_HTML_Path'] = df['Book_ID'].apply(lambda bid: find_local_file(bid, HTML_DIR))
-    
-    # Count matches
-    has_local = df['Local_HTML_Path'].str.len() > 0
-    print(f"   ✅ Matched {has_local.sum()} books with local files")
-    print(f"   ⚠️  {(~has_local).sum()} books still need network fetch")
+    # Only one chunk of rows is held in memory at a time
+    print(f"\n📚 Loading: {CSV_PATH}")
+    print(f"📝 Adding local file paths and saving to: {OUTPUT_CSV}")
+    total = matched = 0
+    # The Parquet copy is built under a temporary name and only renamed into
+    # place once complete; a stale copy from an earlier run is removed first,
+    # even without pyarrow, so load_books() never prefers a Parquet file that
+    # disagrees with the CSV
+    writer = None
+    partial_parquet = OUTPUT_PARQUET.with_suffix('.parquet.tmp')
+    OUTPUT_PARQUET.unlink(missing_ok=True)
+    try:
+        reader = pd.read_csv(CSV_PATH, dtype=CSV_DTYPES, chunksize=CHUNK_SIZE)
+        for i, chunk in enumerate(reader):
+            # One vectorized regex pass over the rows that have a link; rows without
+            # one, or whose link does not match, get NaN when aligned back
+            links = chunk['HTML_Link'].dropna()
+            chunk['Book_ID'] = links.str.extract(BOOK_ID_PATTERN, expand=False)
+            chunk['Local_HTML_Path'] = chunk['Book_ID'].map(local_index).fillna('')
+            
+            total += len(chunk)
+            matched += int((chunk['Local_HTML_Path'].str.len() > 0).sum())
+            
+            first = i == 0
+            chunk.to_csv(OUTPUT_CSV, mode='w' if first else 'a', header=first, index=False)
+            
+            # Typed, columnar copy for load_books(); each chunk is one row group
+            if pq is not None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(partial_parquet, _parquet_schema(table.schema),
+                                              compression='zstd')
+                writer.write_table(table.cast(writer.schema))
+        
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(partial_parquet, OUTPUT_PARQUET)
+            print(f"   Parquet copy saved to: {OUTPUT_PARQUET}")
+    finally:
+        if writer is not None:
+            writer.close()
+        partial_parquet.unlink(missing_ok=True)
     
-    # Save updated CSV
-    print(f"\n💾 Saving updated CSV to: {OUTPUT_CSV}")
-    df.to_csv(OUTPUT_CSV, index=False)
+    print(f"   Total books: {total}")
+    print(f"   ✅ Matched {matched} books with local files")
+    print(f"   ⚠️  {total - matched} books still need network fetch")
     
     print("\n✅ Done! CSV updated with local file paths.")
     print(f"\n💡 Next: Update load_books() in app_enhanced.py to use '{OUTPUT_CSV.name}'")